@@ -3,24 +3,68 @@
 # Refinement:   Make dirs optional cmd line arguments? 
 
 #import dependencies
+import os
+import argparse
 from datetime import datetime
 import src.analysisWrapper as a 
+import src.utils.profiler as profiler
 
-#store current date and time 
-now = datetime.now()
-timeFormat = "%Y-%b-%d-%I%M%p_%Ss"
+if __name__ == "__main__":  #ensures this code will not be ran when this script file is imported by another script, or by a report worker process
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=1, help='number of cells to generate reports for in parallel')
+    parser.add_argument('--incremental', action='store_true', help='update report_incremental/, only regenerating cells whose CSVs changed')
+    parser.add_argument('--keep-images', action='store_true', help='also save every plot image next to the reports, ex. for posters')
+    parser.add_argument('--endurance', nargs='?', const=100, type=int, default=None, metavar='N',
+        help='compact reports for endurance tests: cycle statistics, plus the pages of every Nth cycle (default 100, 0 for none)')
+    parser.add_argument('--from-raw', nargs=2, metavar=('LOG_FILE_NAME', 'DATE'), 
+        help='analyze the raw data of a log file straight away, without keithley_import writing CSVs first')
+    parser.add_argument('--list-cells', action='store_true',
+        help='only print every cell, its size, and how many times and when it was last stimulated. Fast, no report is generated')
+    parser.add_argument('--summary-only', action='store_true',
+        help='only write cellsUsedSummary.txt, from the CSV file names alone. Fast, no CSV is read')
+    parser.add_argument('--profile', action='store_true', 
+        help=f'time every stage, per cell and overall, into profile.json and profile.csv next to cellsUsedSummary.txt (or set {profiler.ENV_VARIABLE}=1)')
+    args = parser.parse_args()
+    if args.from_raw and args.incremental:
+        parser.error('--incremental needs the CSVs in processed_data, it cannot be used with --from-raw')
 
-#set dirs
-input_data_path = "./resources/processed_data/"
-output_report_path = f'./resources/analysis_reports/report_{now.strftime(timeFormat)}/'
+    if args.profile or os.environ.get(profiler.ENV_VARIABLE, '') not in ['', '0']:
+        profiler.enable()
 
-#perform analysis 
+    #store current date and time 
+    now = datetime.now()
+    timeFormat = "%Y-%b-%d-%I%M%p_%Ss"
 
-#data for all csv files in path
-csvData = a.convert_csv_files(input_data_path)  
+    #set dirs
+    input_data_path = "./resources/processed_data/"
+    cache_path = "./resources/processed_data_cache/"  #binary copies of parsed CSVs, safe to delete
+    if args.incremental:
+        output_report_path = './resources/analysis_reports/report_incremental/'
+    else:
+        output_report_path = f'./resources/analysis_reports/report_{now.strftime(timeFormat)}/'
 
-#generate pdf reports for csv files 
-a.generate_reports(output_report_path, csvData)
+    #perform analysis 
+
+    #data for all csv files in path, or for every run of the log file
+    if args.from_raw:
+        csvData = a.convert_raw_runs('./resources/', args.from_raw[0], args.from_raw[1], cache_path, args.jobs)
+    elif args.list_cells or args.summary_only:
+        csvData = a.index_csv_files(input_data_path)  #file names are enough
+    else:
+        csvData = a.convert_csv_files(input_data_path, cache_path)  
+
+    #generate pdf reports for csv files, or only list the cells
+    if args.list_cells:
+        a.list_cells(csvData)
+    elif args.summary_only:
+        a.generate_summary(output_report_path, csvData)
+    elif args.incremental:
+        a.update_reports(output_report_path, csvData, args.jobs, args.keep_images, args.endurance)
+    else:
+        a.generate_reports(output_report_path, csvData, args.jobs, args.keep_images, args.endurance)
+
+    if profiler.isEnabled() and not args.list_cells:
+        profiler.writeReport(output_report_path)
     
     
     
@@ -0,0 +1,182 @@
+# Name:			BatchAnalyzer.py
+# Summary:		Computes the CellAnalyzer metrics of many CSV files at once.
+# Desc:			The AI, AV, and Time columns of every CSV are packed end to end into one flat array each, with the offset of
+#               every CSV's first row (a ragged array). Every metric is then calculated for all CSVs together, with a few numpy
+#               passes over the flat arrays, instead of one function call per CSV.
+#
+#               The results match CellAnalyzer's calcSetVoltage, calcResistance, calcRampRate, and calcCellState, with their
+#               default hyperparameters. Meant for statistics across many runs, ex. every CSV of a wafer. The reports still use
+#               CellAnalyzer.
+
+#import dependencies
+import numpy as np
+import pandas as pd
+
+from src.utils.CsvFile import CsvFile
+
+#PUBLIC
+
+# Name:			RaggedColumns
+# Summary:		The AI, AV, and Time columns of many CSV files, packed end to end.
+# Desc:			Rows of CSV n are offsets[n] to offsets[n+1] of the flat arrays. segment holds the CSV number of every row.
+#               The contents of CSV files loaded only to be packed are released again, contents already loaded are kept.
+class RaggedColumns :
+    def __init__(self, csvFiles) :
+        wasLoaded = [csvFile.isLoaded for csvFile in csvFiles]
+        lengths = np.array([len(csvFile.timeAxis) for csvFile in csvFiles], dtype=np.int64)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.lengths = lengths
+        self.segment = np.repeat(np.arange(len(lengths)), lengths)
+
+        self.AI   = np.empty(self.offsets[-1])
+        self.AV   = np.empty(self.offsets[-1])
+        self.Time = np.empty(self.offsets[-1])
+        for n, csvFile in enumerate(csvFiles) :
+            rows = slice(self.offsets[n], self.offsets[n+1])
+            self.AI[rows]   = csvFile.probeA_current
+            self.AV[rows]   = csvFile.probeA_voltage
+            self.Time[rows] = csvFile.timeAxis
+            if not wasLoaded[n] :
+                csvFile.release()  #copied, so free the file's own copy
+
+    # number of CSVs
+    def __len__(self) -> int :
+        return len(self.lengths)
+
+# Name:			analyzeBatch
+# Summary:		Calculates the metrics of every CSV file.
+# Desc:			Metrics that do not apply to a CSV's activity are NaN (or None for the cell state of an empty CSV), where
+#               CellAnalyzer would raise instead. A set or form without a threshold crossing also gets a NaN set voltage, and
+#               a reset whose fitted currents are all equal gets a NaN R_on and R2. So does a set or form whose name has no
+#               numeric compliance current, ex. an invalid 2 probe activity.
+#
+# Input:		The CSV files, as a list of CsvFile. Contents loaded by this call are released once packed, see RaggedColumns.
+#               set_thresh, linear_thresh, iThresh : float
+#                   Hyperparameters, see CellAnalyzer.calcSetVoltage, __linear_idx, and calcCellState.
+# Output:		A data frame with one row per CSV file, in the same order: 'File', 'Activity', 'Set Voltage', 'R_on', 'R2',
+#               'Ramp Rate', and 'Cell State'.
+def analyzeBatch(csvFiles: list([CsvFile]), set_thresh: float=0.9, linear_thresh: float=15.0, iThresh: float=1.2e-6) -> pd.DataFrame :
+    activities = np.array([csvFile.activity for csvFile in csvFiles], dtype=object)
+    icc = np.array([__getComplianceCurrent(csvFile) for csvFile in csvFiles])
+    cols = RaggedColumns(csvFiles)
+
+    isSet   = np.isin(activities, ['set', 'form'])
+    isReset = activities == 'reset'
+    r_on, r2 = __calcResistances(cols, linear_thresh)
+
+    return pd.DataFrame({
+        'File':        [csvFile.csvFileName for csvFile in csvFiles],
+        'Activity':    activities,
+        'Set Voltage': np.where(isSet, __calcSetVoltages(cols, set_thresh * icc), np.nan),
+        'R_on':        np.where(isReset, r_on, np.nan),
+        'R2':          np.where(isReset, r2, np.nan),
+        'Ramp Rate':   np.where(activities != 'observe', __calcRampRates(cols), np.nan),
+        'Cell State':  __calcCellStates(cols, iThresh)
+    })
+
+#PRIVATE
+
+# compliance current in A (complianceCurrentUnits is always 'A'), NaN when the file name has none
+def __getComplianceCurrent(csvFile) -> float:
+    try:
+        return float(csvFile.complianceCurrent)
+    except (TypeError, ValueError):  #placeholder string of an invalid activity, or not a number
+        return np.nan
+
+# Name:			__firstPerSegment
+# Summary:		Picks the first (or last) of sorted row indices in every CSV.
+#
+# Input:		The sorted global row indices, the segment array, and whether to pick the last instead.
+# Output:		A tuple, (CSV numbers, picked row indices), only for CSVs that have any of the rows.
+def __firstPerSegment(rows, segment, last=False):
+    rowSegments = segment[rows]
+    if last:
+        picks = np.flatnonzero(np.diff(rowSegments, append=-1) != 0)  #last row before the CSV number changes
+    else:
+        picks = np.flatnonzero(np.diff(rowSegments, prepend=-1) != 0)
+    return rowSegments[picks], rows[picks]
+
+# rows k whose next row k+1 is in the same CSV, as a boolean mask
+def __hasNext(cols):
+    hasNext = np.ones(len(cols.segment), dtype=bool)
+    hasNext[cols.offsets[1:] - 1] = False
+    return hasNext[:-1] if len(hasNext) > 0 else hasNext
+
+# Name:			__calcSetVoltages
+# Summary:		Batch calcSetVoltage. Voltage at the last crossing of the threshold current, NaN when never crossed.
+def __calcSetVoltages(cols, thresholds):
+    result = np.full(len(cols), np.nan)
+    if len(cols.segment) == 0:
+        return result
+
+    series = cols.AI >= thresholds[cols.segment]
+    crosses = np.flatnonzero((series[:-1] != series[1:]) & __hasNext(cols))
+    segments, rows = __firstPerSegment(crosses, cols.segment, last=True)
+    result[segments] = cols.AV[rows]
+    return result
+
+# Name:			__calcResistances
+# Summary:		Batch calcResistance. Linear fit of voltage against current up to the first nonlinear jump (see
+#               CellAnalyzer.__linear_idx).
+#
+# Output:		A tuple of arrays, (R_on, R2).
+def __calcResistances(cols, linear_thresh):
+    n = len(cols)
+    if len(cols.segment) == 0:
+        return np.full(n, np.nan), np.full(n, np.nan)
+    local = np.arange(len(cols.segment)) - cols.offsets[cols.segment]  #row number within its CSV
+
+    #__linear_idx compares rows p and p+1, for p from 1 to length-3, and crops the data at p+1 for the first jump
+    r = np.abs(cols.AV / np.maximum(np.abs(cols.AI), 1e-8))
+    dr = 0.5 * np.abs(r[1:] - r[:-1])
+    di = 0.5 * np.abs(cols.AI[1:] - cols.AI[:-1])
+    p = local[:-1]
+    inRange = __hasNext(cols) & (p >= 1) & (p <= cols.lengths[cols.segment[:-1]] - 3)
+    jumps = np.flatnonzero(inRange & ((dr > linear_thresh) | (di < 1e-8)))
+
+    cropLength = cols.lengths.copy()
+    segments, rows = __firstPerSegment(jumps, cols.segment)
+    cropLength[segments] = local[rows] + 1
+
+    #least squares fit of every CSV's cropped rows, like scipy's linregress
+    keep = local < cropLength[cols.segment]
+    segment, i, v = cols.segment[keep], cols.AI[keep], cols.AV[keep]
+    count = np.bincount(segment, minlength=n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iMean = np.bincount(segment, weights=i, minlength=n) / count
+        vMean = np.bincount(segment, weights=v, minlength=n) / count
+        iDev = i - iMean[segment]
+        vDev = v - vMean[segment]
+        sii = np.bincount(segment, weights=iDev * iDev, minlength=n)
+        svv = np.bincount(segment, weights=vDev * vDev, minlength=n)
+        siv = np.bincount(segment, weights=iDev * vDev, minlength=n)
+        r_on = siv / sii
+        rFit = np.clip(siv / np.sqrt(sii * svv), -1.0, 1.0)
+    return r_on, rFit * rFit
+
+# Name:			__calcRampRates
+# Summary:		Batch calcRampRate. Voltage over time at the first crossing of 1 V, or at the last row when never crossed.
+def __calcRampRates(cols):
+    result = np.full(len(cols), np.nan)
+    if len(cols.segment) == 0:
+        return result
+
+    rows = cols.offsets[1:] - 1  #last row of every CSV
+    series = np.abs(cols.AV) >= 1
+    crosses = np.flatnonzero((series[:-1] != series[1:]) & __hasNext(cols))
+    segments, crossRows = __firstPerSegment(crosses, cols.segment)
+    rows[segments] = crossRows
+
+    nonEmpty = cols.lengths > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[nonEmpty] = cols.AV[rows[nonEmpty]] / cols.Time[rows[nonEmpty]]
+    return result
+
+# Name:			__calcCellStates
+# Summary:		Batch calcCellState. 'reset' when the final current is below iThresh, otherwise 'set'.
+def __calcCellStates(cols, iThresh):
+    states = np.full(len(cols), None, dtype=object)
+    nonEmpty = cols.lengths > 0
+    finalCurrent = cols.AI[cols.offsets[1:][nonEmpty] - 1]
+    states[nonEmpty] = np.where(np.abs(finalCurrent) < iThresh, 'reset', 'set')
+    return states
@@ -1,17 +1,93 @@
 # Name:			CellAnalyzer.py
 # Summary:		Methods to extract characteristics from cell IV curves and provides interpretable graphs.
+# Desc:			Every calculation takes the measurement, m, of a CSV file: its AI, AV, and Time columns as plain numpy arrays, see 
+#               Measurement. A pandas data frame with those columns (calcDataFrame) is accepted too, but is slower.
 
 #import dependencies  
 import numpy as np
 import pandas as pd
-from scipy.stats import linregress
 from functools import cached_property
 
 from src.utils.CsvFile import CsvFile
+import src.utils.profiler as profiler
+
+# Name:			CsvAnalysis
+# Summary:		The analysis result of one CSV file.
+# Desc:			Every metric is calculated once, on first access, then kept. Use the instance memoized on the CSV file, 
+#               CsvFile.analysis, so the report pages and the plots share one result. Metrics that do not apply to the CSV's 
+#               activity raise, like the functions they come from. Uses the default hyperparameters of those functions.
+class CsvAnalysis:
+    def __init__(self, csv_file: CsvFile):
+        self.csv_file = csv_file
+
+    # AI, AV, and Time columns, see calcMeasurement
+    @cached_property
+    @profiler.timed('CellAnalyzer: measurement')
+    def measurement(self):
+        return calcMeasurement(self.csv_file)
+
+    # set or form only, float or None
+    @cached_property
+    @profiler.timed('CellAnalyzer: setVoltage')
+    def setVoltage(self):
+        return calcSetVoltage(self.csv_file, self.measurement)
+
+    # reset only, tuple (R_on, R2)
+    @cached_property
+    @profiler.timed('CellAnalyzer: resistance')
+    def resistance(self):
+        return calcResistance(self.csv_file, self.measurement)
+
+    # reset only, tuple (v_min, v_max)
+    @cached_property
+    @profiler.timed('CellAnalyzer: linearRegime')
+    def linearRegime(self):
+        return linear_voltage_regime(self.measurement)
+
+    # true ramp rate in V/s, not observe
+    @cached_property
+    @profiler.timed('CellAnalyzer: rampRate')
+    def rampRate(self) -> float:
+        return calcRampRate(self.csv_file, self.measurement)
+
+    # 'set' or 'reset'
+    @cached_property
+    @profiler.timed('CellAnalyzer: cellState')
+    def cellState(self) -> str:
+        return calcCellState(self.csv_file, self.measurement)
+
+    # cumulative energy input, observe or reset only
+    @cached_property
+    @profiler.timed('CellAnalyzer: energy')
+    def energy(self):
+        return energy_input(self.csv_file, self.measurement)
+
+# Name:			Measurement
+# Summary:		The columns of a CSV file used by the calculations, as numpy arrays.
+# Desc:			Only holds references to the CsvFile's arrays, so making one copies nothing.
+class Measurement:
+    __slots__ = ('AI', 'AV', 'Time')
+
+    def __init__(self, AI, AV, Time):
+        self.AI = AI
+        self.AV = AV
+        self.Time = Time
+
+    # copy of the columns as a pandas data frame, ex. for exporting
+    def toDataFrame(self) -> pd.DataFrame:
+        return pd.DataFrame({'AI': self.AI, 'AV': self.AV, 'Time': self.Time})
+
+# Name:			calcMeasurement
+# Summary:		Constructs the measurement every calculation takes.
+#
+# Input:		csv_file : CsvFile
+# Output:		m : Measurement
+def calcMeasurement(csv_file: CsvFile) -> Measurement:
+    return Measurement(csv_file.probeA_current, csv_file.probeA_voltage, csv_file.timeAxis)
 
 # Name:			calcDataFrame
 # Summary:		Constructs the R_on data handler
-# Desc:			Takes the csv file and returns a pandas data frame
+# Desc:			Takes the csv file and returns a pandas data frame. Only for exporting, the calculations use calcMeasurement.
 #
 # Input:		csvItem : csvItem
 #                   Item containing metadata of the CSV file
@@ -21,11 +97,7 @@ from src.utils.CsvFile import CsvFile
 #                   Hyperparameter controlling 
 # Output:		df
 def calcDataFrame(csv_file: CsvFile, set_thresh: float=0.9, linear_thresh: float=5e-3) -> pd.DataFrame:
-    df = pd.DataFrame({
-        'AI': csv_file.probeA_current,
-        'AV': csv_file.probeA_voltage,
-        'Time': csv_file.timeAxis
-    })
+    df = calcMeasurement(csv_file).toDataFrame()
 
     return df
 
@@ -36,7 +108,7 @@ def calcDataFrame(csv_file: CsvFile, set_thresh: float=0.9, linear_thresh: float
 # Output:		voltage : float or None
 #                   Returns voltage of the last crossing instance. Returns `None` if 
 #                   no crossing is found (e.g. non-conductive cell that remains in nano-Ampère range)    
-def calcSetVoltage(csv_file, df, set_thresh: float=0.9):
+def calcSetVoltage(csv_file, m, set_thresh: float=0.9):
     if not csv_file.activity in ['set', 'form']:
         raise Exception(f"set_voltage() called on data from {csv_file.activity}")  #{self.activity()}: {self.file}
     
@@ -47,7 +119,7 @@ def calcSetVoltage(csv_file, df, set_thresh: float=0.9):
     # we're going to assume that the cell has set after it achieves 90% of Icc
     threshold = set_thresh * icc
 
-    series = df['AI'].values >= threshold
+    series = np.asarray(m.AI) >= threshold
     d = np.diff(series)
 
     # to avoid janky starting curves, take the last time the current crossed the threshold
@@ -59,7 +131,7 @@ def calcSetVoltage(csv_file, df, set_thresh: float=0.9):
     # argwhere will return output in form of shape (n_crossings, 1),
     # so take the last instance and then remove the value from the 0d np array
     idx = crosses[-1][0]
-    voltage = df.at[idx, 'AV'] # get the voltage at the crossing
+    voltage = np.asarray(m.AV)[idx] # get the voltage at the crossing
 
     return voltage
 
@@ -67,12 +139,12 @@ def calcSetVoltage(csv_file, df, set_thresh: float=0.9):
 # Summary:		Calculates the state the cell is currently in at end of calculation.
 #
 # Input:		csv_file : csv file object that is used for calculation
-#               df : dataframe of the calculation
+#               m : measurement of the calculation
 #               iThresh : resistance threshold for determining threshold
 # Output:		string : 'set', 'reset', or 'unknown' 
-def calcCellState(csv_file, df, iThresh = 1.2e-6):
-    i = df['AI'].to_numpy()
-    v = df['AV'].to_numpy()
+def calcCellState(csv_file, m, iThresh = 1.2e-6):
+    i = np.asarray(m.AI)
+    v = np.asarray(m.AV)
 
     if abs(i[-1]) < iThresh:
         return 'reset'
@@ -100,13 +172,13 @@ def calcCellState(csv_file, df, iThresh = 1.2e-6):
 
 # Name:			linear_idx
 # Output:		The first index of data corresponding to a nonlinear jump.
-def __linear_idx(df, linear_thresh: float=15.0):
+def __linear_idx(m, linear_thresh: float=15.0):
     # theory here is that in the linear portion of the IV curve, the resistance
     # should remain constant, so by thresholding the resistance derivative we
     # can accurately identify the derivative
 
-    i = df['AI'].values
-    v = df['AV'].values
+    i = np.asarray(m.AI)
+    v = np.asarray(m.AV)
 
     #resistance is supposed to remain constant until reset, so a large change in that means loss of linearity
     #the np.maximum is to avoid a divide by 0
@@ -129,13 +201,14 @@ def __linear_idx(df, linear_thresh: float=15.0):
 #    
 #               Only works on reset curves
 #
-# Input:		df
+# Input:		m
 # Output:		(v_min, v_max) : A tuple consisting of the linear voltage region    
-def linear_voltage_regime(df):
-    v = df['AV'].values
+def linear_voltage_regime(m):
+    v = np.asarray(m.AV)
 
-    if __linear_idx(df):
-        v = v[:__linear_idx(df)]
+    idx = __linear_idx(m)
+    if idx:
+        v = v[:idx]
 
     return v.min(), v.max()
 
@@ -152,13 +225,15 @@ def linear_voltage_regime(df):
 #                   Detected R_on of the cell, or `None` if the data was too nonlinear
 #               r2 : float
 #                   Linear best fit quality, indirectly returned in property `r2`.
-def calcResistance(csv_file, df):
+def calcResistance(csv_file, m):
+    from scipy.stats import linregress  #scipy is slow to import, only needed here
+
     if not csv_file.activity == 'reset':
         raise Exception(f"resistance() called on data from {csv_file.activity}")
     
-    idx = __linear_idx(df)
-    i = df['AI'].values
-    v = df['AV'].values
+    idx = __linear_idx(m)
+    i = np.asarray(m.AI)
+    v = np.asarray(m.AV)
 
     # crop data if we found nonlinearities
     if idx is not None:
@@ -176,36 +251,38 @@ def calcResistance(csv_file, df):
 
 # Name:			calcRampRate
 # Summary:		Calculates the true ramp rate of the data in V/s.  
-def calcRampRate(csv_file, df) -> float:
+def calcRampRate(csv_file, m) -> float:
     if csv_file.activity == 'observe':
         raise Exception(f"ramp_rate() called on data from observe")
 
-    v = np.abs(df['AV'].values)
+    av = np.asarray(m.AV)
+    time = np.asarray(m.Time)
+    v = np.abs(av)
     series = v >= 1
     d = np.diff(series)
 
     crosses = np.argwhere(d)
 
     if len(crosses) == 0:
-        return df['AV'][len(df['AV'].values)-1] / df['Time'][len(df['Time'].values)-1]
+        return av[len(av)-1] / time[len(time)-1]
     
     else:
         idx = crosses[0][0]
 
-        return df['AV'][idx] / df['Time'][idx]
+        return av[idx] / time[idx]
 
 # Name:			energy_input
 # Summary:		Calculates the amount of energy being input into the system as a cumulative distribution
 # Desc:			Only works on successful resets at this time, as the voltage at compliance current is not
 #               properly handled yet   
-def energy_input(csv_file, df) -> np.ndarray:
+def energy_input(csv_file, m) -> np.ndarray:
     if not csv_file.activity in ['observe', 'reset']:
         raise Exception(f"energy_input() called on data from not from observe or reset")
 
     
-    time = df['Time']
-    i = df['AI']
-    v = np.abs(df['AV'])
+    time = np.asarray(m.Time)
+    i = np.asarray(m.AI)
+    v = np.abs(np.asarray(m.AV))
 
 
     #calculate the length of each timestep using a discrete first order derivative
@@ -219,58 +296,61 @@ def energy_input(csv_file, df) -> np.ndarray:
     return e
 
 # Name:			plot_energy
+# Desc:			Plots the cumulative energy input against time into the 'energy' figure template, and saves in `outfile`, a path
+#               or a file object. Uses the CSV file's analysis result, see CsvAnalysis.
 # Output:		outfile
-def plot_energy(csv_file, df, outfile: str):
+def plot_energy(csv_file, outfile: str):
     
-    import matplotlib.pyplot as plt
     import seaborn as sns
-    sns.set_palette('pastel')
+    import src.figureTemplates as figureTemplates
     
-    fig = plt.figure(figsize=(10, 4), dpi=300)
-    fig.patch.set_facecolor('white')
-    sns.lineplot(x=df.Time, y=energy_input(csv_file, df))
-    plt.xlabel("Time (seconds)")
-    plt.ylabel("Energy (J)")
-
-    plt.savefig(outfile)
-    plt.close()
+    #the palette only applies within this block, so it does not carry over into the plots of the following CSVs and cells
+    with sns.color_palette('pastel'), profiler.stage('figure: energy plot'):
+        analysis = csv_file.analysis
+        fig, ax = figureTemplates.getLinePlot('energy')
+        sns.lineplot(x=analysis.measurement.Time, y=analysis.energy, ax=ax)
+        ax.set_xlabel("Time (seconds)")
+        ax.set_ylabel("Energy (J)")
+
+    fig.savefig(outfile)
     
 # Name:			plot
-# Desc:			Plots IV-curve annotated with what the algorithm interpreted from the data, and saves in `outfile`
-def plot(csv_file, df, outfile: str, set_thresh: float=0.9):
+# Desc:			Plots IV-curve annotated with what the algorithm interpreted from the data into the 'IV' figure template, and saves 
+#               in `outfile`, a path or a file object. Uses the CSV file's analysis result, see CsvAnalysis.
+def plot(csv_file, outfile: str):
     #import libs
-    import matplotlib.pyplot as plt
     import seaborn as sns
+    import src.figureTemplates as figureTemplates
     
-    #
-    sns.set_palette('pastel')
-
-    # create high quality figure and plot IV curve
-    fig = plt.figure(figsize=(10, 4), dpi=300)
-    fig.patch.set_facecolor('white')
-    sns.lineplot(x=df.AV, y=df.AI)
-    plt.xlabel("Voltage $V$ [V]")
-    plt.ylabel("Current $I$ [A]")
-
-    # here we draw a vertical red line at the voltage where the cell was set
-    # and put the voltage in the title
-    if csv_file.activity in ['set', 'form']:
-        if calcSetVoltage(csv_file, df, set_thresh) is None:
-            plt.title(f'{csv_file.activity}: No thresh detected')
-        else:
-            plt.title(f'{csv_file.activity}: {calcSetVoltage(csv_file, df, set_thresh):.2f} V')
-            plt.vlines(calcSetVoltage(csv_file, df, set_thresh), df.AI.min(), df.AI.max(), colors='r')
-
-    # draw a light gray background region behind where the data was linear
-    # and put the resistance/R2 values in the title
-    elif csv_file.activity == 'reset':
-        r_on, r2 = calcResistance(csv_file, df)
-        if r_on is None:
-            plt.title('reset: Too nonlinear')
-        else:
-            plt.title(f'Reset: (R_on = {r_on:.2f} Ω, R2 = {r2:.3f})')
-            x_min, x_max = linear_voltage_regime(df)
-            plt.axvspan(x_min, x_max, facecolor='0.95', zorder=-100)
+    analysis = csv_file.analysis
+    m = analysis.measurement
+
+    #the palette only applies within this block, see plot_energy
+    with sns.color_palette('pastel'), profiler.stage('figure: IV plot'):
+        # reuse high quality figure and plot IV curve
+        fig, ax = figureTemplates.getLinePlot('IV')
+        sns.lineplot(x=m.AV, y=m.AI, ax=ax)
+        ax.set_xlabel("Voltage $V$ [V]")
+        ax.set_ylabel("Current $I$ [A]")
+
+        # here we draw a vertical red line at the voltage where the cell was set
+        # and put the voltage in the title
+        if csv_file.activity in ['set', 'form']:
+            if analysis.setVoltage is None:
+                ax.set_title(f'{csv_file.activity}: No thresh detected')
+            else:
+                ax.set_title(f'{csv_file.activity}: {analysis.setVoltage:.2f} V')
+                ax.vlines(analysis.setVoltage, m.AI.min(), m.AI.max(), colors='r')
+
+        # draw a light gray background region behind where the data was linear
+        # and put the resistance/R2 values in the title
+        elif csv_file.activity == 'reset':
+            r_on, r2 = analysis.resistance
+            if r_on is None:
+                ax.set_title('reset: Too nonlinear')
+            else:
+                ax.set_title(f'Reset: (R_on = {r_on:.2f} Ω, R2 = {r2:.3f})')
+                x_min, x_max = analysis.linearRegime
+                ax.axvspan(x_min, x_max, facecolor='0.95', zorder=-100)
     
-    plt.savefig(outfile)
-    plt.close()
+    fig.savefig(outfile)
@@ -1,26 +1,29 @@
 # Name:			analysisWrapper
 # Summary:		Contains functions to analyze data. NOT datatype classes.
+# Desc:			Only the libraries needed to organize CSV files are imported with this module. The plotting and PDF libraries 
+#               (matplotlib, seaborn, scipy, reportlab, tqdm, through generateReport) are imported by the functions producing a 
+#               figure or PDF, so listing or summarizing cells starts in a fraction of the time.
 #
 # Refinement:   Potentially move generate reports private methods to generateReport.py or a new file.
 
 #import dependencies  
 import os
-import matplotlib.pyplot as plt
+import io
+import json
+import hashlib
 import shutil
+import tempfile
 from collections import OrderedDict
-from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 
 from src.utils.CsvFile import CsvFile
 from src.utils.cellSizeDataBase import cellSizes
-import src.generateReport as generateReport
+import src.utils.csvIndex as csvIndex
+import src.rawImport as rawImport
+import src.utils.profiler as profiler
 
-#pdfGen
-from matplotlib.pyplot import savefig
-
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import utils
+REPORT_VERSION = 2  #bump when the report contents change, so update_reports rebuilds every cell
+FINGERPRINTS_NAME = 'reportFingerprints.json'
 
 #PUBLIC 
 
@@ -29,33 +32,286 @@ from reportlab.lib import utils
 # Refinement:	Combine with __organizeCSVs.
 #
 # Input:		Path to the processed raw Keithley data CSVs, as a string.
+#               Optionally, path to the binary parse cache, as a string. Only new or modified CSVs are parsed from text.
 # Output:		The data, csvData, as an ordered dictionary.
-def convert_csv_files(path):
-    return __organizeCSVs(path)  #data for all csv files in path
+def convert_csv_files(path, cachePath=None):
+    return __organizeCSVs(path, cachePath)  #data for all csv files in path
+
+# Name:			index_csv_files
+# Summary:		Same as convert_csv_files, but only from the CSV file names (see csvIndex).
+# Desc:			Holds CsvName objects instead of CsvFile objects, grouped and ordered the same way. Enough for the cells used 
+#               summary, or to find the CSVs of a cell, without constructing a CsvFile for every CSV.
+#
+# Input:		Path to the processed raw Keithley data CSVs, as a string.
+# Output:		The index, like csvData, as an ordered dictionary.
+def index_csv_files(path):
+    with profiler.stage('index CSV names'):
+        csvNames = csvIndex.indexCsvFolder(path)
+    return __organize(csvNames)
+
+# Name:			convert_raw_runs
+# Summary:		Same as convert_csv_files, but straight from the raw Keithley data, without any CSV (see rawImport).
+# Desc:			Gives the same csvData as running keithley_import with the same arguments, then convert_csv_files, when 
+#               processed_data only holds the CSVs of that import.
+#
+# Input:		The resources directory, as a string ending in '/'.
+#               The log file name without extension, and the date argument, see keithley_import.
+#               Optionally, path to the binary parse cache, as a string. Every run's data is also stored there.
+#               The number of runs to read in parallel, as an int.
+# Output:		The data, csvData, as an ordered dictionary.
+def convert_raw_runs(resourcesDir, logFileName, date, cachePath=None, jobs=1):
+    csvFiles = OrderedDict()
+    with profiler.stage('import raw runs'):
+        csvObjs = rawImport.importRuns(resourcesDir, logFileName, date, cachePath, jobs)
+    for csvObj in csvObjs :
+        csvFiles[csvObj.csvFileName] = csvObj  #a run listed twice in the log file is one CSV, written by its last line
+    return __organize(csvFiles.values())
+
+# Name:			analyze_csv_files
+# Summary:		Computes the metrics of every CSV file in csvData at once, see BatchAnalyzer.
+# Desc:			A CSV shared by more than one cell (heated and observed cell of a three-probe run) is only analysed once.
+#
+# Input:		The data, csvData, as an ordered dictionary.
+# Output:		A data frame with one row per CSV file, in csvData order.
+def analyze_csv_files(csvData):
+    csvFiles = OrderedDict()
+    for value in csvData.values() :
+        for csvObj in value :
+            csvFiles.setdefault(csvObj.csvFileName, csvObj)
+    import src.BatchAnalyzer as BatchAnalyzer  #pandas
+    return BatchAnalyzer.analyzeBatch(list(csvFiles.values()))
+
+# Name:			list_cells
+# Summary:		Prints every cell in csvData, like cellsUsedSummary.txt, without generating any report.
+# Desc:			Only needs the CSV file names, so no CSV is read and no plotting or PDF library is imported.
+#
+# Input:		The data, csvData, or the index from index_csv_files, as an ordered dictionary.
+# Output:		None.
+def list_cells(csvData):
+    for line in __getSummaryLines(__getSummary(csvData)) :
+        print(line)
+    csvFileNames = set(csvObj.csvFileName for value in csvData.values() for csvObj in value)
+    print(f'MESSAGE: {len(csvData)} cells, in {len(csvFileNames)} CSV files.')
+
+# Name:			generate_summary
+# Summary:		Only writes cellsUsedSummary.txt, the first step of generate_reports.
+#
+# Input:		The output path, as a string. 
+#               The data, csvData, or the index from index_csv_files, as an ordered dictionary.
+# Output:		None.
+def generate_summary(path, csvData):
+    os.makedirs(path, exist_ok=True)
+    with profiler.stage('cells used summary'):
+        __generateSummaryReport(path, csvData)
+    print(f'MESSAGE: Wrote the cells used summary of {len(csvData)} cells to {path}.')
 
 # Name:			generate_reports
 # Summary:		Generates a PDF report for EVERY cell encountered in CSV files.
 #
+# Desc:			With jobs > 1, cells are handed out to that many worker processes. Each cell is rendered into its own temporary
+#               folder, then its PDFs are moved into the output path in the same order as the serial loop, so the resulting
+#               set of PDFs is the same.
+#
 # Input:		The output path to store the generated reports, as a string. 
 #               The data, csvData, as an ordered dictionary.
+#               The number of worker processes, as an int. 1 renders every cell in this process.
+#               Whether to also save every plot image next to the reports, in a (<cell>)-images folder per cell, as a bool.
+#               endurance : int or None
+#                   None for the full reports. Otherwise, write the compact endurance reports (see 
+#                   generateReport.generateEnduranceReport), which only include the pages of every endurance-th cycle, and the 
+#                   plots of every endurance-th CSV. 0 for no pages at all.
 # Output:		None.
-def generate_reports(path, csvData):
+def generate_reports(path, csvData, jobs=1, keepImages=False, endurance=None):
     #init
     p = path  #copy path
     os.makedirs(p)  #convert to a path datatype
 
     #create cells used text file and variable
-    summaryDict = __generateSummaryReport(p, csvData)
+    with profiler.stage('cells used summary'):
+        summaryDict = __generateSummaryReport(p, csvData)
 
     # then create a pdf for each of these sublists using the pdfGenerator class and put them in a new reports
     # folder.
-    for key,value in tqdm(csvData.items()) :  #grab the value, all csvItems for a cell, of each csvData entry
-        __pdfGen(value, summaryDict, path)  #combine
-        generateReport.generateReport(value, summaryDict, path) 
+    __generateCellsReports(path, csvData, summaryDict, jobs, keepImages, endurance)
+
+# Name:			update_reports
+# Summary:		Incremental version of generate_reports, only regenerates the reports of cells whose inputs changed.
+# Desc:			Reuses the same output path every time. A fingerprint of every cell's inputs (CSV names, sizes, and modification 
+#               times, its summary, and the report parameters) is stored next to cellsUsedSummary.txt, and only cells whose 
+#               fingerprint changed since the last call get new PDFs. Reports of cells that no longer have any CSV are removed. 
+#               cellsUsedSummary.txt is always rewritten, as it only needs file names.
+#
+# Input:		The output path to store the generated reports, as a string. 
+#               The data, csvData, as an ordered dictionary.
+#               The number of worker processes, as an int.
+#               Whether to also save every plot image next to the reports, as a bool.
+#               The endurance page interval, as an int, or None for the full reports (see generate_reports).
+# Output:		None.
+def update_reports(path, csvData, jobs=1, keepImages=False, endurance=None):
+    import src.generateReport as generateReport
+
+    #init
+    os.makedirs(path, exist_ok=True)
+    with profiler.stage('cells used summary'):
+        summaryDict = __generateSummaryReport(path, csvData)
+
+    oldFingerprints = __loadFingerprints(path)
+    fingerprints = __getFingerprints(csvData, summaryDict, keepImages, endurance)
+
+    #reports are named after the first csv's cell, so more than one cell can write the same reports. Rebuilding all of them, in
+    #order, leaves the same reports as generate_reports would
+    changedData = OrderedDict()
+    for key, value in csvData.items() :
+        reportCoord = value[0].heatedCellCoord
+        if fingerprints[reportCoord] != oldFingerprints.get(reportCoord) :
+            changedData[key] = value
+            shutil.rmtree(generateReport.getImageDir(path, reportCoord), ignore_errors=True)  #only the new images are kept
+
+    for reportCoord in oldFingerprints :
+        if reportCoord not in fingerprints :
+            for pdfName in [f'({reportCoord})_plots.pdf', f'({reportCoord})_characteristics.pdf'] :
+                if os.path.exists(path + '/' + pdfName) :
+                    os.remove(path + '/' + pdfName)
+            shutil.rmtree(generateReport.getImageDir(path, reportCoord), ignore_errors=True)
+
+    print(f'MESSAGE: Regenerating reports for {len(changedData)} of {len(csvData)} cells.')
+    __generateCellsReports(path, changedData, summaryDict, jobs, keepImages, endurance)
+
+    __saveFingerprints(path, fingerprints)  #only once every report is done, so an interrupted run is redone next time
   
   
 #PRIVATE (have not tested to see if using "__name" actually makes it "private" from main script)
 
+# Name:			__generateCellsReports
+# Summary:		Generates both PDF reports of every cell in csvData.
+#
+# Input:		The output path, the data, csvData, the summary dictionary, the number of worker processes, whether to keep
+#               the plot images, and the endurance page interval or None.
+# Output:		None.
+def __generateCellsReports(path, csvData, summaryDict, jobs, keepImages, endurance) -> None:
+    from tqdm import tqdm
+
+    if jobs > 1 :
+        __generateReportsParallel(path, csvData, summaryDict, jobs, keepImages, endurance)
+        return
+
+    for key,value in tqdm(csvData.items()) :  #grab the value, all csvItems for a cell, of each csvData entry
+        __generateCellReports(value, summaryDict, path, keepImages, endurance)
+        for csvObj in value :  #reports for this cell are done, free its data. Reloaded if another cell shares the CSV
+            csvObj.release()
+
+# Name:			__getFingerprints
+# Summary:		Fingerprints the inputs of every report.
+# Desc:			Reports are keyed by the cell they are named after. When more than one cell writes the same reports, all of their
+#               inputs go into that fingerprint, in csvData order.
+#
+# Input:		The data, csvData, the summary dictionary, whether plot images are kept, and the endurance page interval.
+# Output:		Dictionary of the fingerprint of every report, as a hex string.
+def __getFingerprints(csvData, summaryDict, keepImages, endurance) -> dict:
+    import src.generateReport as generateReport
+
+    reportInputs = OrderedDict()
+    for key, value in csvData.items() :
+        reportCoord = value[0].heatedCellCoord
+        if reportCoord not in reportInputs :
+            reportInputs[reportCoord] = {
+                'version': REPORT_VERSION,
+                'parameters': [generateReport.DEFAULT_DPI, generateReport.PLOT_WIDTH, keepImages, endurance],
+                'summary': summaryDict[reportCoord],
+                'cells': []
+            }
+        csvStats = []
+        for csvObj in value :
+            stat = os.stat(csvObj.csvPathString)
+            csvStats.append([csvObj.csvFileName, stat.st_size, stat.st_mtime_ns])
+        reportInputs[reportCoord]['cells'].append([key, csvStats])
+
+    fingerprints = {}
+    for reportCoord, inputs in reportInputs.items() :
+        fingerprints[reportCoord] = hashlib.sha256(json.dumps(inputs).encode('utf8')).hexdigest()
+    return fingerprints
+
+def __loadFingerprints(path) -> dict:
+    try:
+        with open(path + '/' + FINGERPRINTS_NAME, 'r', encoding = 'utf8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def __saveFingerprints(path, fingerprints) -> None:
+    with open(path + '/' + FINGERPRINTS_NAME, 'w', encoding = 'utf8') as file:
+        json.dump(fingerprints, file, indent = 1)
+
+# Name:			__generateReportsParallel
+# Summary:		Parallel version of the report loop in generate_reports.
+# Desc:			Results are collected in csvData order (not completion order), since two cells can write a PDF with the same
+#               name, and the last one must win just like in the serial loop.
+#
+# Input:		The output path, the data, csvData, the summary dictionary, the number of worker processes, whether to keep
+#               the plot images, and the endurance page interval or None.
+# Output:		None.
+def __generateReportsParallel(path, csvData, summaryDict, jobs, keepImages, endurance) -> None:
+    from tqdm import tqdm
+
+    workDirs = [tempfile.mkdtemp(prefix='.cell', dir=path) + '/' for _ in csvData]
+    cells = list(csvData.values())
+    n = len(cells)
+
+    try :
+        with ProcessPoolExecutor(max_workers=jobs, initializer=__initReportWorker, initargs=(profiler.isEnabled(),)) as executor :
+            results = executor.map(__runCellReports, cells, [summaryDict] * n, workDirs, [keepImages] * n, [endurance] * n)
+            for workDir, (outputNames, profileRecords) in tqdm(zip(workDirs, results), total=n) :
+                profiler.addRecords(profileRecords)
+                for outputName in outputNames :
+                    if os.path.isdir(workDir + outputName) :  #an image folder, replaced as a whole like the PDFs
+                        shutil.rmtree(path + '/' + outputName, ignore_errors=True)
+                    os.replace(workDir + outputName, path + '/' + outputName)
+                shutil.rmtree(workDir)
+    finally :  #also when a cell fails, so no work folder is left in the report folder
+        for workDir in workDirs :
+            shutil.rmtree(workDir, ignore_errors=True)
+
+# Name:			__initReportWorker
+# Summary:		Sets up a report worker process. Figures are only ever saved to file, so use the non-interactive Agg backend.
+#               Profiles the worker too when the main process is profiled.
+def __initReportWorker(profile=False) -> None:
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend('Agg')
+    if profile :
+        profiler.enable()
+
+# Name:			__runCellReports
+# Summary:		__generateCellReports, in a worker process.
+#
+# Output:		The names written to workDir, and the profile records of the cell (see profiler.takeRecords), as a tuple.
+def __runCellReports(csvItemObjList, summaryDict, workDir, keepImages, endurance) -> tuple:
+    outputNames = __generateCellReports(csvItemObjList, summaryDict, workDir, keepImages, endurance)
+    return outputNames, profiler.takeRecords()
+
+# Name:			__generateCellReports
+# Summary:		Generates both PDF reports of one cell into workDir. Runs inside a worker process with jobs > 1.
+#
+# Input:		All csvItems for the cell, the summary dictionary, the folder to write to, as a string ending in '/', 
+#               whether to keep the plot images, and the endurance page interval or None.
+# Output:		The names of the PDFs (and image folder) written to workDir, as a list of strings.
+def __generateCellReports(csvItemObjList, summaryDict, workDir, keepImages, endurance=None) -> list:
+    import src.generateReport as generateReport
+
+    with profiler.cell(csvItemObjList[0].heatedCellCoord) :
+        if endurance is None :
+            with profiler.stage('plots report'):
+                __pdfGen(csvItemObjList, summaryDict, workDir, keepImages)
+            with profiler.stage('characteristics report'):
+                generateReport.generateReport(csvItemObjList, summaryDict, workDir, keepImages)
+        else :
+            with profiler.stage('plots report'):
+                __pdfGen(csvItemObjList, summaryDict, workDir, keepImages, pageEvery=endurance)
+            with profiler.stage('characteristics report'):
+                generateReport.generateEnduranceReport(csvItemObjList, summaryDict, workDir, endurance, keepImages)
+
+    return os.listdir(workDir)
+
 # Name:			__organizeCSVs
 # Summary:		Organizes every CSV file in the given location.
 # Desc:			
@@ -68,17 +324,28 @@ def generate_reports(path, csvData):
 #               Contains nested method definition.
 #
 # Input:		Path for CSVs, as a string.
+#               Path for the binary parse cache, as a string, or None to not use it.
 # Output:		Organized files, as an ordered dictionary, csvData.
-def __organizeCSVs(inputDataPath) -> OrderedDict :
+def __organizeCSVs(inputDataPath, cachePath=None) -> OrderedDict :
     # find all csv files, filter out README.md
-    csvFileNames = os.listdir(inputDataPath)
+    with profiler.stage('list CSVs'):
+        csvFileNames = os.listdir(inputDataPath)
     if "README.md" in csvFileNames:
         csvFileNames.remove("README.md")
 
+    with profiler.stage('CsvFile construction', len(csvFileNames)):
+        csvItemObjects = [CsvFile(inputDataPath + csv, cachePath) for csv in csvFileNames]
+    return __organize(csvItemObjects)
+
+# Name:			__organize
+# Summary:		Organizes CsvFile objects, see __organizeCSVs.
+#
+# Input:		The CsvFile objects (or CsvName objects, see csvIndex), as an iterable.
+# Output:		Organized files, as an ordered dictionary, csvData.
+def __organize(csvItemObjects) -> OrderedDict :
     # first fill up entire dictionary
     cellDataDict = OrderedDict()
-    for csv in csvFileNames :  #for every file
-        csvItemObject = CsvFile(inputDataPath + csv)
+    for csvItemObject in csvItemObjects :  #for every file
 
         # if target cell doesn't exist in dict create empty list then append to it, otherwise just append.
         if cellDataDict.get(f'{csvItemObject.heatedCellCoord}') == None :
@@ -114,6 +381,22 @@ def __organizeCSVs(inputDataPath) -> OrderedDict :
 # Input:		CSV cell data, as an ordered dictionary.
 # Output:		The summary report, as an ordered dictionary.     
 def __generateSummaryReport(output_path, csvData) -> dict:
+    summaryReportDict = __getSummary(csvData)
+
+    file = open(output_path+f'/cellsUsedSummary.txt', 'w')
+    for line in __getSummaryLines(summaryReportDict) :
+        file.write(line+'\n')
+    file.close()
+    
+    #done
+    return summaryReportDict
+
+# Name:			__getSummary
+# Summary:		The cells used summary of __generateSummaryReport, without writing it.
+#
+# Input:		CSV cell data, as an ordered dictionary.
+# Output:		The summary report, as an ordered dictionary.
+def __getSummary(csvData) -> dict:
     #init
     summaryReportDict = OrderedDict()  #result
     
@@ -143,17 +426,14 @@ def __generateSummaryReport(output_path, csvData) -> dict:
         cellSummaryDict['lastAccessed'] = f'{value[-1].timeStamp_year}/{value[-1].timeStamp_month}/{value[-1].timeStamp_day} at {value[-1].timeStamp_time12hr}'
         summaryReportDict[key] = cellSummaryDict
 
+    return summaryReportDict
+
+# the lines of cellsUsedSummary.txt, header first
+def __getSummaryLines(summaryReportDict) -> list:
     outputTextFile = ["Cell Coordinate,Cell Size,no. of times stimulated,last stimulated"]
     for key, value in summaryReportDict.items() :
         outputTextFile.append(f"({key}),{value['cellSize']},{value['timesAccessed']},{value['lastAccessed']}")
-
-    file = open(output_path+f'/cellsUsedSummary.txt', 'w')
-    for line in outputTextFile :
-        file.write(line+'\n')
-    file.close()
-    
-    #done
-    return summaryReportDict
+    return outputTextFile
 
 # Name:			__pdfgen
 # Summary:		Generates a PDF file for csv data.
@@ -166,8 +446,18 @@ def __generateSummaryReport(output_path, csvData) -> dict:
 #                   Contains summary information about the cell in question.
 #               pdfDumpPath : str
 #                   Path to output the pdf, as a string.
+#               keepImages : bool
+#                   Also save the plot images in pdfDumpPath/(<cell>)-images/. Otherwise they only exist in memory.
+#               pageEvery : int
+#                   Only include the plots of every pageEvery-th CSV (the 1st, 1 + pageEvery-th, ...), for endurance tests. 
+#                   0 for none.
 # Output:		None.
-def __pdfGen(csvItemObjList: list([CsvFile]), summaryDict: dict, pdfDumpPath: str) -> None:
+def __pdfGen(csvItemObjList: list([CsvFile]), summaryDict: dict, pdfDumpPath: str, keepImages: bool = False, pageEvery: int = 1) -> None:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
+    from reportlab.lib.styles import getSampleStyleSheet
+    import src.generateReport as generateReport
+
     cellCoord = csvItemObjList[0].heatedCellCoord
     cellSummaryDict = summaryDict[cellCoord]
     
@@ -196,10 +486,14 @@ def __pdfGen(csvItemObjList: list([CsvFile]), summaryDict: dict, pdfDumpPath: st
     flowables.append(Paragraph(f"- Last Stimulated = {cellSummaryDict['lastAccessed']}", styles["BodyText"]))
 
     # add sections with plots for each csv
-    tempImageDir = pdfDumpPath+f'tempImgs/'
-    os.makedirs(tempImageDir)
+    imageDir = generateReport.getImageDir(pdfDumpPath, cellCoord) if keepImages else None  #None keeps images in memory only
+    if imageDir is not None:
+        os.makedirs(imageDir, exist_ok=True)
     for i, csvObj in enumerate(csvItemObjList) :
-        plots = csvObj.getPlots()
+        if pageEvery <= 0 or i % pageEvery != 0 :
+            continue
+        with profiler.stage('figure: probe plots'):
+            plots = csvObj.getPlots()
         
         flowables.append(Paragraph(f"-------------------------------------------------", styles["BodyText"]))
         flowables.append(Paragraph(f"Stimulated at {csvObj.timeStamp_time12hr} on {csvObj.timeStamp_year}/{csvObj.timeStamp_month}/{csvObj.timeStamp_day} ", styles["BodyText"]))
@@ -230,42 +524,56 @@ def __pdfGen(csvItemObjList: list([CsvFile]), summaryDict: dict, pdfDumpPath: st
         PLOT_WIDTH = 400
 
         if type(plots['probe A plot']) != str :
-            imgDir = tempImageDir+f'{i}_tempFigA.jpg'
-            plots['probe A plot'].savefig(imgDir,bbox_inches='tight',dpi=DEFAULT_DPI)
-            flowables.append(__getImage(imgDir, PLOT_WIDTH))
-            plt.close(plots['probe A plot']) # do this to save memory
+            image = __renderImage(plots['probe A plot'], f'{i}_figA.jpg', imageDir, DEFAULT_DPI)
+            flowables.append(__getImage(image, PLOT_WIDTH))
             flowables.append(Paragraph("\n", styles["BodyText"]))
 
         if type(plots['probe B plot']) != str :
-            imgDir = tempImageDir+f'{i}_tempFigB.jpg'
-            plots['probe B plot'].savefig(imgDir,bbox_inches='tight',dpi=DEFAULT_DPI)
-            flowables.append(__getImage(imgDir, PLOT_WIDTH))
-            plt.close(plots['probe B plot']) # do this to save memory
+            image = __renderImage(plots['probe B plot'], f'{i}_figB.jpg', imageDir, DEFAULT_DPI)
+            flowables.append(__getImage(image, PLOT_WIDTH))
             flowables.append(Paragraph("\n", styles["BodyText"]))
 
         if type(plots['probe C plot']) != str :
-            imgDir = tempImageDir+f'{i}_tempFigC.jpg'
-            plots['probe C plot'].savefig(imgDir,bbox_inches='tight',dpi=DEFAULT_DPI)
-            flowables.append(__getImage(imgDir, PLOT_WIDTH))
-            plt.close(plots['probe C plot']) # do this to save memory
+            image = __renderImage(plots['probe C plot'], f'{i}_figC.jpg', imageDir, DEFAULT_DPI)
+            flowables.append(__getImage(image, PLOT_WIDTH))
             flowables.append(Paragraph("\n", styles["BodyText"]))
 
         flowables.append(PageBreak())
 
-    doc.build(flowables)
-
-    shutil.rmtree(tempImageDir)
+    with profiler.stage('doc.build: plots'):
+        doc.build(flowables)
 #end __pdfGen()
 
+# Name:			__renderImage
+# Summary:		Saves a figure into an in-memory JPEG image.
+# Desc:			When imageDir is not None, the image is also written to imageDir/name.
+#
+# Input:		The figure, the image file name, the image folder or None, and the resolution in dpi.
+# Output:		The image, as a file object.
+def __renderImage(figure, name, imageDir, dpi):
+    image = io.BytesIO()
+    with profiler.stage('savefig'):
+        figure.savefig(image, format='jpg', bbox_inches='tight', dpi=dpi)
+    if imageDir is not None:
+        with open(f'{imageDir}/{name}', 'wb') as file:
+            file.write(image.getbuffer())
+    image.seek(0)
+    return image
+
 # Name:			__getImage
 # Summary:		Resize an image.
 # Desc:			Makes resizing images to scale easy.
 # Refinement:	Rename __getImage to be more clear.
 #
-# Input:		The path to the image to resize, and the desired width.
+# Input:		The image file object (or path to the image) to resize, and the desired width.
 # Output:		An Image object.  
-def __getImage(path, width=1):
-    img = utils.ImageReader(path)
+def __getImage(image, width=1):
+    from reportlab.platypus import Image
+    from reportlab.lib import utils
+
+    img = utils.ImageReader(image)
     iw, ih = img.getSize()
     aspect = ih / float(iw)
-    return Image(path, width=width, height=(width * aspect))
\ No newline at end of file
+    if hasattr(image, 'seek'):
+        image.seek(0)  #ImageReader read it, rewind for Image
+    return Image(image, width=width, height=(width * aspect))
\ No newline at end of file
@@ -0,0 +1,247 @@
+# Name:			figureTemplates
+# Summary:		Pre-laid-out matplotlib figures, reused for every CSV instead of building a new figure per plot.
+# Desc:			Building a figure, its axes, labels, and ticks is a large share of report time. Each layout here is built once per
+#               process, the first time it is needed, then every plot only swaps the line data, limits, ticks, and titles.
+#
+#               A rendered figure is only valid until its layout is rendered again, so save it before the next render. Never
+#               close a template figure. They are not registered with pyplot, so plt.close() and plt.gcf() never touch them.
+#
+#               Lines plotted against time are decimated to a few points per pixel column first (see decimate), and current
+#               against voltage to a bounded number of points (see decimatePath), so long observe captures render as fast as
+#               short ones, and no spike is lost.
+#
+#               Layouts:
+#                   'probe A', 'probe B', 'probe C' - time/voltage/current and current/voltage panels of one probe
+#                   'observe'                        - currents of probe A and B against time, on twin axes
+#                   'IV'                             - IV curve annotated by CellAnalyzer.plot
+#                   'energy'                         - cumulative energy of CellAnalyzer.plot_energy
+# Refinement:	Sets/Resets/Resistance figures of generateReport are only made once per cell, so they are not templated.
+
+#import dependencies
+import numpy as np
+from matplotlib.figure import Figure
+
+MAX_DPI = 800  #highest resolution figures are saved at (poster images), lines are decimated to the pixel columns at this dpi
+
+#PUBLIC
+
+# Name:			renderProbe
+# Summary:		Plots one probe's voltage and current against time, and current against voltage.
+#
+# Input:		Layout name ('probe A', 'probe B', or 'probe C'), figure title, and the time, voltage, and current columns.
+# Output:		The rendered figure.
+def renderProbe(name: str, suptitle: str, time, voltage, current) -> Figure :
+    return __getTemplate(name, ProbeTemplate).render(suptitle, time, voltage, current)
+
+# Name:			renderObserve
+# Summary:		Plots the currents of probe A and B of a three-probe observe run against time, on twin axes.
+#
+# Input:		The time, probe A current, and probe B current columns.
+# Output:		The rendered figure.
+def renderObserve(time, probeA_current, probeB_current) -> Figure :
+    return __getTemplate('observe', ObserveTemplate).render(time, probeA_current, probeB_current)
+
+# Name:			getLinePlot
+# Summary:		Returns the cleared figure and axes of a seaborn line plot layout ('IV' or 'energy'), ready to be plotted on.
+def getLinePlot(name: str) :
+    template = __getTemplate(name, LinePlotTemplate)
+    template.clear()
+    return template.figure, template.ax
+
+#PRIVATE
+
+__templates = {}  #layout name -> template, one of each per process
+
+def __getTemplate(name, templateClass) :
+    if name not in __templates :
+        __templates[name] = templateClass()
+    return __templates[name]
+
+#helpers of the template classes, without the __ prefix since classes would mangle their names
+
+# Name:			decimate
+# Summary:		Min/max decimation of a line against time, down to at most 4 points per pixel column.
+# Desc:			Splits the time range into one bin per pixel column, and keeps the first, smallest, largest, and last point of
+#               every bin, in time order. That draws nearly the same pixels as the full line, since within one column only the
+#               extremes are visible, so spikes are always kept. Short lines and lines whose time is not increasing are
+#               returned as is.
+#
+# Input:		The time and value columns, and the number of pixel columns.
+# Output:		A tuple, (time, values), of the points to plot.
+def decimate(time, values, columns):
+    n = len(time)
+    if n <= 4 * columns or np.any(np.diff(time) < 0) :
+        return time, values
+
+    edges = np.linspace(time[0], time[-1], columns + 1)[1:-1]
+    starts = np.unique(np.concatenate(([0], np.searchsorted(time, edges))))  #first point of every non-empty bin
+    ends = np.append(starts[1:], n) - 1
+    counts = ends - starts + 1
+
+    keep = np.unique(np.concatenate([starts, ends] + extremeIndices(values, starts, counts)))
+    return time[keep], values[keep]
+
+# Name:			decimatePath
+# Summary:		Min/max decimation of a line that is not plotted against time, ex. current against voltage.
+# Desc:			Like decimate, but splits the samples into bins of consecutive samples, and keeps the first and last point of
+#               every bin, and the smallest and largest point of both coordinates. The line then still reaches every extreme,
+#               and the number of points is bounded however long the capture is. Short lines are returned as is.
+#
+# Input:		The x and y columns, and the number of bins.
+# Output:		A tuple, (x, y), of the points to plot.
+def decimatePath(x, y, bins):
+    n = len(x)
+    if n <= 4 * bins :
+        return x, y
+
+    starts = np.unique(np.linspace(0, n, bins, endpoint=False).astype(np.intp))
+    ends = np.append(starts[1:], n) - 1
+    counts = ends - starts + 1
+    keep = np.unique(np.concatenate([starts, ends] + extremeIndices(x, starts, counts) + extremeIndices(y, starts, counts)))
+    return x[keep], y[keep]
+
+# indices of the first smallest and first largest value of every bin, as two arrays, for decimate and decimatePath
+def extremeIndices(values, starts, counts) -> list :
+    indices = []
+    for extremes in (np.fmin.reduceat(values, starts), np.fmax.reduceat(values, starts)) :  #fmin/fmax skip NaN
+        matches = np.flatnonzero(values == np.repeat(extremes, counts))
+        matchBins = np.searchsorted(starts, matches, side='right') - 1
+        indices.append(matches[np.unique(matchBins, return_index=True)[1]])  #first match of every bin
+    return indices
+
+# number of pixel columns of an axes, at MAX_DPI
+def pixelColumns(figure, ax) -> int :
+    return max(int(figure.get_figwidth() * ax.get_position().width * MAX_DPI), 1)
+
+#ticks derived from the data, the same way getPlots always has
+def timeTicks(time) :
+    maxTime = max(int(time[-1])+1, 1)
+    return np.arange(0, int(maxTime), (maxTime)//7)
+
+def valueTicks(values) :
+    return np.linspace(np.min(values), np.max(values), 5)
+
+#drops the previous data limits, so the axes scale to the new data only
+def rescale(ax) -> None :
+    ax.relim()
+    ax.autoscale_view()
+
+# Name:			ProbeTemplate
+# Summary:		Layout of the 'probe A/B/C plots' figures of CsvFile.getPlots.
+# Desc:			The order of the data, autoscale, and tick updates below matches the order in which a new figure would be built,
+#               so the output is the same.
+class ProbeTemplate :
+    def __init__(self) :
+        self.figure = Figure()
+        self.figure.subplots_adjust(wspace=0, hspace=1)
+
+        self.time_voltage_plot    = self.figure.add_subplot(2, 1, 1)
+        self.time_current_plot    = self.time_voltage_plot.twinx()
+        self.voltage_current_plot = self.figure.add_subplot(2, 1, 2)
+
+        self.time_voltage_plot.set_xlabel("Time (seconds)", fontsize='small')
+        self.time_voltage_plot.set_ylabel("Voltage ($V$)", fontsize='small', color='red')
+        self.time_voltage_plot.set_title("Voltage and Current against Time", fontsize='small', weight = 'bold')
+        self.time_voltage_line = self.time_voltage_plot.plot([], [], color='red')[0]
+        self.time_voltage_plot.tick_params(axis='y', colors="red")
+
+        self.time_current_plot.set_xlabel("Time (seconds)", fontsize='small')
+        self.time_current_plot.set_ylabel("Current ($A$)", fontsize='small', color="blue")
+        self.time_current_line = self.time_current_plot.plot([], [], color="blue")[0]
+        self.time_current_plot.tick_params(axis='y', colors="blue")
+
+        self.voltage_current_plot.set_xlabel("Voltage ($V$)", fontsize='small')
+        self.voltage_current_plot.set_ylabel("Current ($A$)", fontsize='small')
+        self.voltage_current_plot.set_title('Current against Voltage', fontsize='small', weight = 'bold')
+        self.voltage_current_line = None  #default color, so drawn in render() after resetting the color cycle
+        self.columns = pixelColumns(self.figure, self.time_voltage_plot)
+
+        #annotate plot for presentation
+        #set
+        #time_voltage_plot.axhline(y = 6.45, color = 'gray', linestyle = '--', label="Vset")
+        #time_voltage_plot.legend(bbox_to_anchor=(0.01, 1.25), loc='upper left', borderaxespad=0)
+        #time_voltage_plot.annotate('(6.45, 1.5)', xy=(11.55, 6.4), xytext=(8.5, 3), arrowprops=dict(facecolor='black', width=1, headwidth=6))
+        #reset
+        #time_voltage_plot.axhline(y = -1.58, color = 'gray', linestyle = '--', label="Vreset")
+        #time_voltage_plot.legend(bbox_to_anchor=(0.01, 1.25), loc='upper left', borderaxespad=0)
+        #time_voltage_plot.annotate('(6.45, 1.5)', xy=(9.7, 6.4), xytext=(6, -0.4), arrowprops=dict(facecolor='black', width=1, headwidth=6))
+
+    def render(self, suptitle, time, voltage, current) -> Figure :
+        self.figure.suptitle(suptitle, fontsize=16)
+
+        self.time_voltage_line.set_data(*decimate(time, voltage, self.columns))
+        rescale(self.time_voltage_plot)
+        self.time_voltage_plot.set_xticks(timeTicks(time))
+        self.time_voltage_plot.set_yticks(valueTicks(voltage))
+
+        self.time_current_line.set_data(*decimate(time, current, self.columns))
+        rescale(self.time_current_plot)
+        self.time_current_plot.set_xticks(timeTicks(time))
+        self.time_current_plot.set_yticks(valueTicks(current))
+
+        #the default line color follows the current color cycle, like a new figure would. CellAnalyzer only changes the
+        #cycle (seaborn palette) within its own plots, so this is always the default cycle
+        if self.voltage_current_line is not None :
+            self.voltage_current_line.remove()
+        self.voltage_current_plot.relim()
+        self.voltage_current_plot.set_prop_cycle(None)
+        self.voltage_current_line = self.voltage_current_plot.plot(*decimatePath(voltage, current, self.columns))[0]
+        self.voltage_current_plot.set_xticks(valueTicks(voltage))
+        self.voltage_current_plot.set_yticks(valueTicks(current))
+
+        return self.figure
+
+# Name:			ObserveTemplate
+# Summary:		Layout of the three-probe 'Observe' figure of CsvFile.getPlots.
+class ObserveTemplate :
+    def __init__(self) :
+        self.figure = Figure()
+        self.figure.subplots_adjust(wspace=0, hspace=1)
+        self.figure.suptitle('Observe', fontsize=16)
+        self.time_current_plot  = self.figure.add_subplot(2, 1, 1)
+        self.time_current_plotB = self.time_current_plot.twinx()
+
+        self.time_current_plot.set_xlabel("Time (seconds)", fontsize='small')
+        self.time_current_plot.set_ylabel("Probe A Current ($A$)", fontsize='small', color="red")
+        #self.time_current_plot.set_ylabel("Heated Cell Current ($A$)", fontsize='small', color="red")
+        self.time_current_line = self.time_current_plot.plot([], [], color="red")[0]
+        self.time_current_plot.tick_params(axis='y', colors="red")
+
+        self.time_current_plotB.set_ylabel("Probe B Current ($A$)", fontsize='small', color="blue")
+        #self.time_current_plotB.set_ylabel("Observed Cell Current ($A$)", fontsize='small', color="blue")
+        self.time_current_plotB.margins(0.01, 0.01)
+        self.time_current_plotB.use_sticky_edges = False
+        self.time_current_lineB = self.time_current_plotB.plot([], [], color="blue")[0]
+        self.time_current_plotB.tick_params(axis='y', colors="blue")
+        self.columns = pixelColumns(self.figure, self.time_current_plot)
+
+    #to zoom in, set the axis limits after the ticks, ex. time_current_plot.axis(xmin=169,xmax=369), and start the time ticks at xmin
+    def render(self, time, probeA_current, probeB_current) -> Figure :
+        self.time_current_line.set_data(*decimate(time, probeA_current, self.columns))
+        rescale(self.time_current_plot)
+        self.time_current_plot.set_xticks(timeTicks(time))
+        self.time_current_plot.set_yticks(valueTicks(probeA_current))
+
+        self.time_current_lineB.set_data(*decimate(time, probeB_current, self.columns))
+        rescale(self.time_current_plotB)
+        self.time_current_plotB.set_yticks(valueTicks(probeB_current))
+
+        return self.figure
+
+# Name:			LinePlotTemplate
+# Summary:		10x4 inch, 300 dpi figure with one axes, used for the seaborn plots of CellAnalyzer.
+# Desc:			seaborn adds its own artists (lines, and bands when x values repeat), so those are removed by clear() rather than
+#               updated in place. The axes, its spines, and its ticks are kept.
+class LinePlotTemplate :
+    def __init__(self) :
+        self.figure = Figure(figsize=(10, 4), dpi=300)
+        self.figure.patch.set_facecolor('white')
+        self.ax = self.figure.add_subplot()
+
+    def clear(self) -> None :
+        for artist in list(self.ax.lines) + list(self.ax.collections) + list(self.ax.patches) :
+            artist.remove()
+        self.ax.set_title('')
+        self.ax.set_prop_cycle(None)  #restart the color cycle, like a new figure would
+        self.ax.relim()
+        self.ax.set_autoscale_on(True)
@@ -6,11 +6,12 @@
 
 #import dependencies  
 import os
-import shutil
+import io
 from dataclasses import dataclass
 import pandas
-from typing import Iterable, Dict, List, OrderedDict
-import math, copy
+from typing import Iterable, Dict, List, Optional, OrderedDict
+import math
+import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
@@ -18,9 +19,14 @@ from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, PageBreakIfNotEmpty, Table, ListFlowable, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import utils
+from reportlab import rl_config
+
+rl_config.invariant = 1  #no creation date or random document ID in the PDFs, so the same data gives byte-identical reports
 
 import src.CellAnalyzer as ca
 from src.utils.CsvFile import CsvFile
+from src.utils.enduranceStats import EnduranceStats
+import src.utils.profiler as profiler
 
 defaultFontSize = 15
 titlePlotFontSize = 22
@@ -33,6 +39,20 @@ LINE_WIDTH = 3  #pixel thickness
 #memory saver
 DEFAULT_DPI = 300  
 PLOT_WIDTH = 400
+
+# Name:			CycleRecord
+# Summary:		One set/reset cycle of a cell, filled in by __generatePage as its CSVs are processed.
+# Desc:			A cell's cycles are a list of these, appended to once per completed cycle. Values not measured (yet) are NaN.
+#               setData and resetData are the indices, in the cell's CSV list, of the set and reset CSVs, None until there is one.
+@dataclass
+class CycleRecord:
+    cycle: int
+    setIcc: float = math.nan
+    setVoltage: float = math.nan
+    r_on: float = math.nan
+    r2: float = math.nan
+    setData: Optional[int] = None
+    resetData: Optional[int] = None
             
 # Name:			generateReport
 # Summary:		Generates a PDF file and outputs a pdf in the folder path.
@@ -43,8 +63,11 @@ PLOT_WIDTH = 400
 #                   Cell usage summary dict created by databaseCollator
 #               pdfFolder : str
 #                   Folder in which to save PDF file
+#               keepImages : bool
+#                   Also save every plot image in pdfFolder/(<cell>)-images/, useful when need high DPI images of plots. 
+#                   Otherwise images only exist in memory.
 # Output:		None.
-def generateReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfFolder: str):
+def generateReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfFolder: str, keepImages: bool = False):
     #init
     cellCoord = csvItems[0].heatedCellCoord
     pdfFolder = pdfFolder
@@ -52,19 +75,13 @@ def generateReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfF
 
     items = csvItems
 
-    cellSummaryDict = summaryDict[cellCoord]
-    cellSize = cellSummaryDict['cellSize']
-    timesAccessed = cellSummaryDict['timesAccessed']
-    lastAccessed = cellSummaryDict['lastAccessed']
-    global df
-    df = pandas.DataFrame(columns=['Cycle', 'Set Icc', 'Set Voltage', 'R_on', 'R2', 'Set Data', 'Reset Data'], copy=True)
-    summaryTable = [["Cycle #", "Set Icc (μA)", "Set Voltage (V)", "R_on (Ω)", "R2"]]
-    #summaryTable.append([None, None, None, None, None])
+    cycles = []  #list of CycleRecord, the last one is the cycle in progress
     
     #generate report 
     
-    tmpDir = f'{pdfFolder}/({cellCoord})-dump'
-    os.makedirs(tmpDir)
+    imageDir = getImageDir(pdfFolder, cellCoord) if keepImages else None  #None keeps images in memory only
+    if imageDir is not None:
+        os.makedirs(imageDir, exist_ok=True)
 
     # setup document
     doc = SimpleDocTemplate(
@@ -77,20 +94,7 @@ def generateReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfF
     styles = getSampleStyleSheet()
 
     # this is the series of items to be produced in our pdf
-    flowables = [    
-        # add heading
-        Paragraph(f'({cellCoord}) Characteristics', styles["Heading1"]),
-        Paragraph(f'——————————————————————————————————', styles["Heading2"]),
-        ListFlowable(
-            [
-                Paragraph(f"<b>Cell Size:</b> {cellSize} (not verified)", styles["BodyText"]),
-                Paragraph(f"<b>Times Accessed:</b> {timesAccessed}", styles["BodyText"]),
-                Paragraph(f"<b>Last Measurement:</b> {lastAccessed}", styles["BodyText"])
-            ],
-            bulletType='bullet'
-        ),
-        Paragraph("Summary", styles["Heading4"])
-    ]
+    flowables = __getCellHeader(cellCoord, summaryDict[cellCoord], styles)
 
     pages = []
     
@@ -101,152 +105,217 @@ def generateReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfF
         if page.activity == 'observe':
             continue
 
-        for flowable in __generatePage(page, i, tmpDir, df, summaryTable):  #df and summaryTable modified by method
+        for flowable in __generatePage(page, i, imageDir, cycles):  #cycles modified by method
             pages.append(flowable)
         
         # put each operation on its own page
         #if i < len(items) - 1:
             #pages.append(PageBreakIfNotEmpty())
     
-    setfig = plt.figure(figsize=(12, 6), dpi=DEFAULT_DPI)
-    plt.rcParams.update({'font.size': defaultFontSize})
-    ax = setfig.add_subplot(1, 1, 1)
-    ax.set_title('Sets',fontsize = titlePlotFontSize)
-    ax.set_xlabel("Voltage $V$ [V]", fontsize = axisLabelFontSize)
-    ax.set_ylabel("Current $I$ [A]", fontsize = axisLabelFontSize)
-    used_pages = []
-    setCount = 0
-    setSum = 0
-    setSumSquared = 0
-    #technically bad to iterate through rows in a columnar database
-    #as it defeats their purpose, however these are small db and
-    #frankly columnar is overkill for them
-    for (cycle, icc, v, ron, r2, set, reset) in df.itertuples(index=False):
-        if isinstance(set, int):
-            page = items[set]
-            labelString = f'{icc:.1f} μA'
-            if cycle == 1:
-                labelString += ' (form)'
-            ax.plot(page.probeA_voltage, page.probeA_current, label = labelString, linewidth = LINE_WIDTH)
-            ax.legend(loc='best')
-            if(not math.isnan(v) and v > 0.3):
-                setCount += 1
-                setSum += v
-                setSumSquared += v * v
-    if (setCount == 0):
-        print("\nMESSAGE: Due to cell having zero valid sets, expect its summary set data in Characteristics to be empty.\n")
-        mean = setSum
-        variance = 0
-        stdDev = 0
-    else:
-        mean = setSum / setCount
-        variance = setSumSquared / setCount - (mean * mean)
-        stdDev = math.sqrt(variance)
+    #the font size set below only applies to this cell's summary figures, rc_context restores it afterwards. Otherwise it would
+    #carry over into the plots of every following cell
+    with plt.rc_context():
+        with profiler.stage('figure: sets'):
+            setfig = plt.figure(figsize=(12, 6), dpi=DEFAULT_DPI)
+            plt.rcParams.update({'font.size': defaultFontSize})
+            ax = setfig.add_subplot(1, 1, 1)
+            ax.set_title('Sets',fontsize = titlePlotFontSize)
+            ax.set_xlabel("Voltage $V$ [V]", fontsize = axisLabelFontSize)
+            ax.set_ylabel("Current $I$ [A]", fontsize = axisLabelFontSize)
+            used_pages = []
+            setCount = 0
+            setSum = 0
+            setSumSquared = 0
+            for record in cycles:
+                v = record.setVoltage
+                if record.setData is not None:
+                    page = items[record.setData]
+                    labelString = f'{record.setIcc:.1f} μA'
+                    if record.cycle == 1:
+                        labelString += ' (form)'
+                    ax.plot(page.probeA_voltage, page.probeA_current, label = labelString, linewidth = LINE_WIDTH)
+                    ax.legend(loc='best')
+                    if(not math.isnan(v) and v > 0.3):
+                        setCount += 1
+                        setSum += v
+                        setSumSquared += v * v
+        if (setCount == 0):
+            print("\nMESSAGE: Due to cell having zero valid sets, expect its summary set data in Characteristics to be empty.\n")
+            mean = setSum
+            variance = 0
+            stdDev = 0
+        else:
+            mean = setSum / setCount
+            variance = setSumSquared / setCount - (mean * mean)
+            stdDev = math.sqrt(variance)
         
-    #ax.legend(loc='best')
-    setfig.savefig(f'{tmpDir}/sets.png')
-
-    resetfig = plt.figure(figsize=(12, 6), dpi=DEFAULT_DPI)
-    plt.rcParams.update({'font.size': defaultFontSize})
-    ax = resetfig.add_subplot(1, 1, 1)
-    ax.set_title('Resets',fontsize = titlePlotFontSize)
-    ax.set_xlabel("Voltage $V$ [V]", fontsize = axisLabelFontSize)
-    ax.set_ylabel("Current $I$ [A]", fontsize = axisLabelFontSize)
-    for (cycle, icc, v, ron, r2, set, reset) in df.itertuples(index=False):
-        if isinstance(reset, int) and ron < 10000 and r2 > 0.997:
-            page = items[reset]
-            labelString = f'{icc:.1f} μA'
-            ax.plot(page.probeA_voltage, page.probeA_current, label = labelString, linewidth = LINE_WIDTH)
-            ax.legend(loc='best')
-    resetfig.savefig(f'{tmpDir}/resets.png')
-
-
-    summaryTableFlowable = Table(summaryTable)
-    flowables.append(summaryTableFlowable)
-    flowables.append(Paragraph(f'<b>Mean Set Voltage:</b> {mean:.2f}V', styles['BodyText']))
-    flowables.append(Paragraph(f'<b>Std Deviation:</b> {stdDev:.2f}V', styles['BodyText']))
-    flowables.append(__getIccRonPlot(tmpDir, df))
+        #ax.legend(loc='best')
+        setImage = __renderImage(setfig.savefig, 'sets.png', imageDir)
+        plt.close(setfig)
+
+        with profiler.stage('figure: resets'):
+            resetfig = plt.figure(figsize=(12, 6), dpi=DEFAULT_DPI)
+            plt.rcParams.update({'font.size': defaultFontSize})
+            ax = resetfig.add_subplot(1, 1, 1)
+            ax.set_title('Resets',fontsize = titlePlotFontSize)
+            ax.set_xlabel("Voltage $V$ [V]", fontsize = axisLabelFontSize)
+            ax.set_ylabel("Current $I$ [A]", fontsize = axisLabelFontSize)
+            for record in cycles:
+                if record.resetData is not None and record.r_on < 10000 and record.r2 > 0.997:
+                    page = items[record.resetData]
+                    labelString = f'{record.setIcc:.1f} μA'
+                    ax.plot(page.probeA_voltage, page.probeA_current, label = labelString, linewidth = LINE_WIDTH)
+                    ax.legend(loc='best')
+        resetImage = __renderImage(resetfig.savefig, 'resets.png', imageDir)
+        plt.close(resetfig)
+
+
+        summaryTableFlowable = Table(__getSummaryTable(cycles))
+        flowables.append(summaryTableFlowable)
+        flowables.append(Paragraph(f'<b>Mean Set Voltage:</b> {mean:.2f}V', styles['BodyText']))
+        flowables.append(Paragraph(f'<b>Std Deviation:</b> {stdDev:.2f}V', styles['BodyText']))
+        flowables.append(__getIccRonPlot(imageDir, cycles))
     flowables.append(PageBreak())
-    flowables.append(__getImage(f'{tmpDir}/sets.png', PLOT_WIDTH))
-    flowables.append(__getImage(f'{tmpDir}/resets.png', PLOT_WIDTH))
+    flowables.append(__getImage(setImage, PLOT_WIDTH))
+    flowables.append(__getImage(resetImage, PLOT_WIDTH))
     flowables.append(PageBreakIfNotEmpty())
 
     flowables += pages
 
     if len(flowables) > 0:
+        with profiler.stage('doc.build: characteristics'):
+            doc.build(flowables)
+
+# Name:			generateEnduranceReport
+# Summary:		Compact version of generateReport, for cells cycled thousands of times in endurance tests.
+# Desc:			Processes the cell's CSVs one at a time and keeps only running statistics of its cycles (see enduranceStats): 
+#               set voltage mean and standard deviation, an R_on histogram, and both per decade of cycles. Each CSV's data is 
+#               released once processed, and no curve is overlaid, so memory and PDF size no longer grow with every cycle.
+#               Writes the same ({cell})_characteristics.pdf as generateReport.
+#
+# Input:		csvItems, summaryDict, pdfFolder, keepImages : see generateReport
+#               pageEvery : int
+#                   Also include the pages of generateReport for every pageEvery-th cycle (1, 1 + pageEvery, ...). 0 for none.
+# Output:		None.
+def generateEnduranceReport(csvItems: List[CsvFile], summaryDict: Dict[str, object], pdfFolder: str, pageEvery: int, keepImages: bool = False):
+    cellCoord = csvItems[0].heatedCellCoord
+    imageDir = getImageDir(pdfFolder, cellCoord) if keepImages else None
+    if imageDir is not None:
+        os.makedirs(imageDir, exist_ok=True)
+
+    doc = SimpleDocTemplate(
+        f"{pdfFolder}/({cellCoord})_characteristics.pdf",
+        pagesize=letter,
+        rightMargin=35, leftMargin=35,
+        topmargin=10, bottommargin=18,
+    )
+    styles = getSampleStyleSheet()
+    flowables = __getCellHeader(cellCoord, summaryDict[cellCoord], styles)
+
+    stats = EnduranceStats()
+    cycles = []  #only ever the cycle in progress, and one just completed
+    pages = []
+    for i, page in enumerate(csvItems):
+        if page.activity == 'observe':
+            continue
+
+        props = __updateCycles(page, i, cycles)
+        if pageEvery > 0 and (props['Cycle'] - 1) % pageEvery == 0:
+            pages += __getPageFlowables(page, i, imageDir, props)
+        page.release()
+
+        while len(cycles) > 1:
+            __addCycleStats(stats, cycles.pop(0))
+    if len(cycles) > 0 and (cycles[0].setData is not None or cycles[0].resetData is not None):
+        __addCycleStats(stats, cycles[0])  #the last cycle is not complete, but its set still counts, like in generateReport
+
+    completedCycles = cycles[0].cycle - 1 if len(cycles) > 0 else 0
+    flowables += __getEnduranceSummary(stats, completedCycles, styles)
+    if stats.r_on.count > 0:
+        flowables.append(__getR_onHistogram(imageDir, stats))
+    if len(pages) > 0:
+        flowables.append(PageBreak())
+        flowables.append(Paragraph(f'Pages of every {pageEvery} cycles', styles["Heading4"]))
+        flowables += pages
+
+    with profiler.stage('doc.build: characteristics'):
         doc.build(flowables)
 
-    shutil.rmtree(tmpDir)  #comment this out to keep plot images, useful when need high DPI images of plots. Not stable.  
+# Name:			getImageDir
+# Summary:		Folder the plot images of a cell are kept in, when keeping images.
+#
+# Input:		The report folder and the cell coordinate, as strings.
+# Output:		The folder path, as a string.
+def getImageDir(pdfFolder: str, cellCoord: str) -> str:
+    return f'{pdfFolder}/({cellCoord})-images'
 
 # Name:			generatePage
 # Summary:		Takes a CSV item and returns a list of flowables.
 # Desc:			Does not work on observe.
 #
-# Input:		df, summaryTable are modified
-# Output:		Flowables and df and summary table   
-def __generatePage(page: CsvFile, i: int, tmpDir, df, summaryTable) -> List:
-    if len(df.index) == 0:
-        df.loc[0, 'Cycle'] = int(1)
-
-    stateIndex = len(df.index) - 1
-    prevStateIndex = max(0, len(df.index) - 2)
+# Input:		cycles, the cell's list of CycleRecord, is modified
+# Output:		Flowables and cycles
+def __generatePage(page: CsvFile, i: int, imageDir, cycles) -> List:
+    props = __updateCycles(page, i, cycles)
+    return __getPageFlowables(page, i, imageDir, props)
+
+# Name:			updateCycles
+# Summary:		Adds a CSV item's results to the cycle in progress, and starts a new cycle when the cell was reset.
+# Desc:			Does not work on observe.
+#
+# Input:		cycles, the cell's list of CycleRecord, is modified
+# Output:		The properties listed on the CSV item's page, as an ordered dictionary.
+def __updateCycles(page: CsvFile, i: int, cycles) -> OrderedDict:
+    if len(cycles) == 0:
+        cycles.append(CycleRecord(cycle=1))
+
+    state = cycles[-1]
     
-    df_calc = ca.calcDataFrame(page)
+    analysis = page.analysis  #every metric is calculated once, and shared with the plots
 
-    # header
-    styles = getSampleStyleSheet()
-    flowables = [
-        Paragraph(page.activity, styles["Heading2"]),
-        Paragraph(f'——————————————————————————————————', styles["Heading2"])
-    ]
     props = OrderedDict({
         'Time': page.timeStamp_time12hr,
         'Icc': f'#{page.complianceCurrent:.1f}{page.complianceCurrentUnits}',
         'Voltage Range': f'{page.startVoltage}  →  {page.endVoltage}',
         'Target Ramp Rate': f'{page.rampRate}',
-        'True Ramp Rate': f'{ca.calcRampRate(page, df_calc):.3f} V/s*',
-        'Cycle': df.loc[stateIndex, 'Cycle']
+        'True Ramp Rate': f'{analysis.rampRate:.3f} V/s*',
+        'Cycle': state.cycle
     })
     reset_cell = False
     if page.activity == 'reset':
         # successful reset
-        if ca.calcResistance(page, df_calc):
-            resistance, r2 = ca.calcResistance(page, df_calc)
+        if analysis.resistance:
+            resistance, r2 = analysis.resistance
 
             #Is this part necessary?
-            #if df.loc[stateIndex, 'Set Icc'] is None:
-            #    df.loc[stateIndex, 'Set Icc'] = df.loc[prevStateIndex, 'Set Icc']
-            #    df.loc[stateIndex, 'Set Voltage'] = df.loc[prevStateIndex, 'Set Voltage']
+            #if math.isnan(state.setIcc) and len(cycles) > 1:
+            #    state.setIcc = cycles[-2].setIcc
+            #    state.setVoltage = cycles[-2].setVoltage
 
-            df.loc[stateIndex, 'R_on'] = resistance
-            df.loc[stateIndex, 'R2'] = r2
+            state.r_on = resistance
+            state.r2 = r2
 
             props['Resistance'] = f'{resistance:.2f} Ω' #f'{state.r_on:.2f} Ω'
             props['Linear Fit R2'] = f'{r2:.3f}'
 
         else:
             props['Error'] = 'Too nonlinear/failed'
-        if ca.calcCellState(page, df_calc) == 'reset':
+        if analysis.cellState == 'reset':
             reset_cell = True
-            df.loc[stateIndex, 'Reset Data'] = i
-        #test code not to be merged
-        ca.plot_energy(page, df_calc, f'{tmpDir}/ca_plot_energy{i}.png')
-        flowables.append(__getImage(f'{tmpDir}/ca_plot_energy{i}.png', width=PLOT_WIDTH))
+            state.resetData = i
 
     else:
         # successful set/form
         #check to make sure the cell isn't already in set condition
         #by checking to make sure the set voltage isn't too low as well
-        set_voltage = ca.calcSetVoltage(page, df_calc)
+        set_voltage = analysis.setVoltage
         if set_voltage is not None and set_voltage > 0.3:
             
-            df.loc[stateIndex, 'Set Icc'] = page.complianceCurrent * 1e6
-            df.loc[stateIndex, 'Set Voltage'] = set_voltage
-
-            set_voltage = df.loc[stateIndex, 'Set Voltage']
+            state.setIcc = page.complianceCurrent * 1e6
+            state.setVoltage = set_voltage
             
             props['Set Voltage'] = f'{set_voltage:.2f} V'
-            df.loc[stateIndex, 'Set Data'] = i
+            state.setData = i
 
         elif set_voltage is None:
             props['Error'] = 'Set failed'
@@ -254,16 +323,28 @@ def __generatePage(page: CsvFile, i: int, tmpDir, df, summaryTable) -> List:
             props['Error'] = 'Set ran on cell that was already set'
 
     cycle_complete = reset_cell
-    temp = df.loc[stateIndex, 'Set Icc']
-    props['Icc'] = f'{temp:.1f}μA'
+    props['Icc'] = f'{state.setIcc:.1f}μA'
     if cycle_complete:
-        df.loc[len(df.index), 'Cycle'] = df.loc[stateIndex, 'Cycle'] + 1
-        summaryTable.append(copy.deepcopy(df.loc[stateIndex]))
-        summaryTable[len(df.index) - 1][1] = format(summaryTable[len(df.index) - 1][1],'.1f')
-        summaryTable[len(df.index) - 1][2] = format(summaryTable[len(df.index) - 1][2],'.2f')
-        summaryTable[len(df.index) - 1][3] = format(summaryTable[len(df.index) - 1][3],'.0f')
-        summaryTable[len(df.index) - 1][4] = format(summaryTable[len(df.index) - 1][4],'.5f')
+        cycles.append(CycleRecord(cycle=state.cycle + 1))
 
+    return props
+
+# Name:			getPageFlowables
+# Summary:		The page of a CSV item, listing the properties found by __updateCycles.
+#
+# Input:		The CSV item, its index, the image folder or None, and its properties.
+# Output:		Flowables.
+def __getPageFlowables(page: CsvFile, i: int, imageDir, props) -> List:
+    # header
+    styles = getSampleStyleSheet()
+    flowables = [
+        Paragraph(page.activity, styles["Heading2"]),
+        Paragraph(f'——————————————————————————————————', styles["Heading2"])
+    ]
+    if page.activity == 'reset':
+        #test code not to be merged
+        energyImage = __renderImage(lambda file: ca.plot_energy(page, file), f'ca_plot_energy{i}.png', imageDir)
+        flowables.append(__getImage(energyImage, width=PLOT_WIDTH))
 
     # add the properties as a bulleted list
     flowables.append(ListFlowable(
@@ -275,40 +356,176 @@ def __generatePage(page: CsvFile, i: int, tmpDir, df, summaryTable) -> List:
     flowables.append(Paragraph(page.comments, styles['BodyText']))
 
     # generate the plot
-    plotName = f'{tmpDir}/ca_plot_{i}.png'
-    ca.plot(page, df_calc, plotName)
-    flowables.append(__getImage(plotName, width=PLOT_WIDTH))
+    plotImage = __renderImage(lambda file: ca.plot(page, file), f'ca_plot_{i}.png', imageDir)
+    flowables.append(__getImage(plotImage, width=PLOT_WIDTH))
+
+    return flowables
+
+# Name:			getCellHeader
+# Summary:		Heading and cell details at the top of the characteristics report.
+#
+# Input:		The cell coordinate, the cell's entry of the summary dictionary, and the style sheet.
+# Output:		Flowables.
+def __getCellHeader(cellCoord, cellSummaryDict, styles) -> List:
+    return [    
+        # add heading
+        Paragraph(f'({cellCoord}) Characteristics', styles["Heading1"]),
+        Paragraph(f'——————————————————————————————————', styles["Heading2"]),
+        ListFlowable(
+            [
+                Paragraph(f"<b>Cell Size:</b> {cellSummaryDict['cellSize']} (not verified)", styles["BodyText"]),
+                Paragraph(f"<b>Times Accessed:</b> {cellSummaryDict['timesAccessed']}", styles["BodyText"]),
+                Paragraph(f"<b>Last Measurement:</b> {cellSummaryDict['lastAccessed']}", styles["BodyText"])
+            ],
+            bulletType='bullet'
+        ),
+        Paragraph("Summary", styles["Heading4"])
+    ]
 
+# Name:			addCycleStats
+# Summary:		Adds a cycle to the endurance statistics. Only R_on of good linear fits count, like in the Resistance plot.
+def __addCycleStats(stats, record) -> None:
+    r_on = record.r_on if (record.r_on < 10000 and record.r2 >= 0.997) else math.nan
+    stats.add(record.cycle, record.setVoltage, r_on)
+
+# Name:			getEnduranceSummary
+# Summary:		Overall and per decade statistics of an endurance report.
+#
+# Input:		The EnduranceStats, the number of completed cycles, and the style sheet.
+# Output:		Flowables.
+def __getEnduranceSummary(stats, completedCycles, styles) -> List:
+    setVoltage, r_on = stats.setVoltage, stats.r_on
+    setText, r_onText = 'no successful set', 'no reset with R_on < 10000 Ω and R2 ≥ 0.997'
+    if setVoltage.count > 0:
+        setText = (f'{setVoltage.mean:.2f} ± {setVoltage.std:.2f} V over {setVoltage.count} sets '
+                   f'(min {setVoltage.min:.2f} V, max {setVoltage.max:.2f} V)')
+    if r_on.count > 0:
+        r_onText = (f'{r_on.mean:.0f} ± {r_on.std:.0f} Ω over {r_on.count} resets with R_on < 10000 Ω and R2 ≥ 0.997 '
+                    f'(median {stats.r_onHistogram.percentile(50):.0f} Ω)')
+    flowables = [ListFlowable(
+        [
+            Paragraph(f'<b>Completed Cycles:</b> {completedCycles}', styles['BodyText']),
+            Paragraph(f'<b>Set Voltage:</b> {setText}', styles['BodyText']),
+            Paragraph(f'<b>R_on:</b> {r_onText}', styles['BodyText'])
+        ],
+        bulletType='bullet'
+    )]
+
+    decadeTable = [["Cycles", "Sets", "Set Voltage (V)", "Std (V)", "Resets", "R_on P10 (Ω)", "R_on P50 (Ω)", "R_on P90 (Ω)"]]
+    for decade in sorted(stats.decades):
+        decadeSetVoltage, decadeR_on = stats.decades[decade]
+        decadeTable.append([
+            EnduranceStats.decadeLabel(decade),
+            decadeSetVoltage.count,
+            format(decadeSetVoltage.mean, '.2f') if decadeSetVoltage.count > 0 else '-',
+            format(decadeSetVoltage.std, '.2f') if decadeSetVoltage.count > 0 else '-',
+            decadeR_on.total,
+            format(decadeR_on.percentile(10), '.0f') if decadeR_on.total > 0 else '-',
+            format(decadeR_on.percentile(50), '.0f') if decadeR_on.total > 0 else '-',
+            format(decadeR_on.percentile(90), '.0f') if decadeR_on.total > 0 else '-'
+        ])
+    if len(decadeTable) > 1:
+        flowables.append(Paragraph("Per Decade of Cycles", styles["Heading4"]))
+        flowables.append(Table(decadeTable))
+        flowables.append(Paragraph('R_on percentiles are estimated from histograms with 20 bins per decade.', styles['BodyText']))
     return flowables
 
+# Name:			getSummaryTable
+# Summary:		Rows of the summary table, one per completed cycle, under the header row.
+#
+# Input:		cycles, the cell's list of CycleRecord
+# Output:		The table data, as a list of lists.
+def __getSummaryTable(cycles) -> List:
+    summaryTable = [["Cycle #", "Set Icc (μA)", "Set Voltage (V)", "R_on (Ω)", "R2"]]
+    for record in cycles[:-1]:  #the last cycle is not complete
+        summaryTable.append([
+            record.cycle,
+            format(record.setIcc, '.1f'),
+            format(record.setVoltage, '.2f'),
+            format(record.r_on, '.0f'),
+            format(record.r2, '.5f')
+        ])
+    return summaryTable
+
+# Name:			renderImage
+# Summary:		Saves a plot into an in-memory PNG image.
+# Desc:			When imageDir is not None, the image is also written to imageDir/name.
+#
+# Input:		save, a function saving the plot to the file object it is given (ex. fig.savefig), the image file name, and
+#               the image folder or None.
+# Output:		The image, as a file object.
+def __renderImage(save, name, imageDir):
+    image = io.BytesIO()
+    with profiler.stage('savefig'):
+        save(image)
+    if imageDir is not None:
+        with open(f'{imageDir}/{name}', 'wb') as file:
+            file.write(image.getbuffer())
+    image.seek(0)
+    return image
+
 # Name:			getImage
 # Summary:		Resize image to scale.
 #
-# Input:		path to image, and desired width.
+# Input:		image file object (or path to image), and desired width.
 # Output:		Image as an object.
-def __getImage(path, width=1):
-    img = utils.ImageReader(path)
+def __getImage(image, width=1):
+    img = utils.ImageReader(image)
     iw, ih = img.getSize()
     aspect = ih / float(iw)
-    return Image(path, width=width, height=(width * aspect))
+    if hasattr(image, 'seek'):
+        image.seek(0)  #ImageReader read it, rewind for Image
+    return Image(image, width=width, height=(width * aspect))
+
+# Name:			getR_onHistogram
+# Summary:		Generates a PNG image of the R_on histogram of an endurance report.
+#
+# Input:		imageDir (None to keep the image in memory only), the EnduranceStats
+# Output:		Image of plot as an object.
+def __getR_onHistogram(imageDir, stats) -> Image:
+    histogram = stats.r_onHistogram
+    used = np.flatnonzero(histogram.counts)
+    first, last = used[0], used[-1] + 1  #only plot the bins in use
+
+    with plt.rc_context():
+        plt.rcParams.update({'font.size': defaultFontSize})
+        with profiler.stage('figure: R_on histogram'):
+            fig = plt.figure(figsize=(10, 6), dpi=DEFAULT_DPI)
+            fig.patch.set_facecolor('white')
+            ax = fig.add_subplot(1, 1, 1)
+            edges = histogram.edges[first:last + 1]
+            ax.bar(edges[:-1], histogram.counts[first:last], width=np.diff(edges), align='edge', color='red')
+            ax.set_xscale('log')
+            ax.set_title("Resistance", fontsize = titlePlotFontSize)
+            ax.set_xlabel("$R_{on}$ [Ω]", fontsize = axisLabelFontSize)
+            ax.set_ylabel("Cycles", fontsize = axisLabelFontSize)
+        image = __renderImage(fig.savefig, 'r_on_histogram.png', imageDir)
+        plt.close(fig)
+
+    return __getImage(image, width=PLOT_WIDTH)
 
 # Name:			getIccRonPlot
 # Summary:		Generates a PNG image of the desired plot.
 #
-# Input:		path, df
+# Input:		imageDir (None to keep the image in memory only), cycles
 # Output:		Image of plot as an object.  
-def __getIccRonPlot(tmpDir, df) -> Image:
-    path = f"{tmpDir}/r_on_plot.png"
-
-    fig = plt.figure(figsize=(10, 6),dpi=DEFAULT_DPI)
-    fig.patch.set_facecolor('white')
-    #print(df.loc[df.R2 >= 0.98, ['Set Icc', 'R_on']])
-    sns.scatterplot(data=df.loc[df.R_on < 10000, :].loc[df.R2 >= 0.997 , ['Set Icc', 'R_on']], x="Set Icc", y="R_on",color = "red", linewidth = LINE_WIDTH, s = 100)
-    #sns.lineplot(data=df.loc[df.R_on < 10000, :].loc[df.R2 >= 0.997 , ['Set Icc', 'R_on']], x="Set Icc", y="R_on",estimator='max', color='black')
-    plt.title("Resistance")
-    plt.xlabel("$I_{cc}$ [μA]")
-    plt.ylabel("$R_{on}$ [Ω]")
-    plt.savefig(path)
-    plt.close()
-
-    return __getImage(path, width=PLOT_WIDTH)
\ No newline at end of file
+def __getIccRonPlot(imageDir, cycles) -> Image:
+    df = pandas.DataFrame({
+        'Set Icc': [record.setIcc for record in cycles],
+        'R_on': [record.r_on for record in cycles],
+        'R2': [record.r2 for record in cycles]
+    })
+
+    with profiler.stage('figure: R_on plot'):
+        fig = plt.figure(figsize=(10, 6),dpi=DEFAULT_DPI)
+        fig.patch.set_facecolor('white')
+        #print(df.loc[df.R2 >= 0.98, ['Set Icc', 'R_on']])
+        sns.scatterplot(data=df.loc[df.R_on < 10000, :].loc[df.R2 >= 0.997 , ['Set Icc', 'R_on']], x="Set Icc", y="R_on",color = "red", linewidth = LINE_WIDTH, s = 100)
+        #sns.lineplot(data=df.loc[df.R_on < 10000, :].loc[df.R2 >= 0.997 , ['Set Icc', 'R_on']], x="Set Icc", y="R_on",estimator='max', color='black')
+        plt.title("Resistance")
+        plt.xlabel("$I_{cc}$ [μA]")
+        plt.ylabel("$R_{on}$ [Ω]")
+    image = __renderImage(fig.savefig, 'r_on_plot.png', imageDir)
+    plt.close(fig)
+
+    return __getImage(image, width=PLOT_WIDTH)
\ No newline at end of file
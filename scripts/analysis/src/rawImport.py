@@ -0,0 +1,82 @@
+# Name:			rawImport
+# Summary:		Reads raw Keithley data straight into CsvFile objects, without writing or parsing any CSV text.
+# Desc:         Uses the processing script, keithley_import, to read the log file and every run's excel workbook, then hands the
+#               validated Sheet1 rows to the analysis directly. Each workbook is decoded once, and the result is the same as
+#               running keithley_import then parsing the CSVs it wrote.
+#
+#               The CsvFile objects are named after the CSV keithley_import would have written, so reports, file names, and the
+#               cells used summary do not change.
+# Refinement:   Move keithley_import into a package shared by processing and analysis.
+
+#import dependencies
+import os
+import io
+import csv
+import sys
+
+from src.utils.CsvFile import CsvFile
+import src.utils.csvCache as csvCache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'processing'))
+import keithley_import
+
+#PUBLIC
+
+# Name:			importRuns
+# Summary:		Reads every run of the log file, like keithley_import does, into CsvFile objects.
+# Desc:			keithley_import's messages are printed in log file order. Runs that fail to be read are listed at the end and
+#               skipped.
+#
+# Input:		The resources directory, as a string ending in '/'.
+#               The log file name without extension, and the date argument, see keithley_import.
+#               Optionally, the directory of the binary parse cache (see csvCache). When given, every run's data is also
+#               stored there and memory-mapped back, so it does not need to stay in memory until the reports are generated.
+#               The number of runs to read in parallel, as an int.
+# Output:		A list of CsvFile objects, in log file order.
+def importRuns(resourcesDir: str, logFileName: str, date: str, cacheDir: str = None, jobs: int = 1) -> list([CsvFile]) :
+    logFile = f'{resourcesDir}raw_data/{logFileName}.csv'
+    rows = keithley_import.get_log_jobs(logFile, date)  #(printed text, list of RunJob) for every log file line
+    runJobs = [job for rowOutput, rowJobs in rows for job in rowJobs]
+    index = keithley_import.index_runs(resourcesDir)
+    keithley_import.check_runs(runJobs, index, date)
+    keithley_import.load_run_times(runJobs)
+    keithley_import.save_run_index(index, resourcesDir)
+
+    csvFiles = []
+    failed = []
+    runs = keithley_import.stream_runs(runJobs, resourcesDir, jobs)
+    for rowOutput, rowJobs in rows :
+        print(rowOutput, end='')
+        for job, run, runOutput in (next(runs) for _ in rowJobs) :
+            print(runOutput, end='')
+            if run is None :
+                failed.append(f'{job.ln.procedure_type}/Run{job.num} (log line {job.row_idx + 1})')
+            else :
+                csvFiles.append(__getCsvFile(job, run, resourcesDir, cacheDir))
+
+    print(f'MESSAGE: Read {len(csvFiles)} of {len(runJobs)} runs.')
+    for run in failed :
+        print(f'ERROR: Failed to read {run}.')
+    return csvFiles
+
+#PRIVATE
+
+# Name:			__getCsvFile
+# Summary:		Creates the CsvFile object of a run read by keithley_import.
+#
+# Input:		The RunJob and RunData of the run, the resources directory, and the cache directory or None.
+# Output:		CsvFile object, holding the run's data.
+def __getCsvFile(job, run, resourcesDir, cacheDir) -> CsvFile :
+    csvName = f'{run.file_name}.csv'
+    title = [str(name) for name in run.title]
+    comments = __getCommentLine(run.comment)
+    columns = run.columns
+    if cacheDir is not None :
+        columns = csvCache.storeColumns(csvName, job.run.xls_path, cacheDir, title, comments, columns)
+    return CsvFile(f'{resourcesDir}processed_data/{csvName}', contents=(title, comments, columns))
+
+# the comment as csvParser reads it back from the CSV, quoted by the csv writer when it has commas or quotes
+def __getCommentLine(comment) -> str :
+    line = io.StringIO()
+    csv.writer(line).writerow([comment])
+    return line.getvalue().rstrip('\r\n')
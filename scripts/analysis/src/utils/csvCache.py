@@ -0,0 +1,120 @@
+# Name:			csvCache
+# Summary:		Binary cache of parsed CSV files, so unchanged CSVs are never parsed from text twice.
+# Desc:         Every CSV gets two entries in the cache directory, named after the CSV file:
+#                   <csv name>.npy  - the column data, exactly as returned by csvParser.parseCsv
+#                   <csv name>.json - the title row, comments, and the key (path, size, mtime) the data was parsed from
+#               An entry is only used when its key still matches the CSV on disk. Otherwise the CSV is parsed again and the
+#               entry is overwritten. Cached column data is memory-mapped read-only, so it is paged in only as it is used.
+
+#import dependencies
+import os
+import json
+import numpy as np
+
+import src.utils.csvParser as csvParser
+import src.utils.profiler as profiler
+
+CACHE_VERSION = 1  #bump when the cached layout changes, older entries are then ignored
+
+#PUBLIC
+
+# Name:			loadCsv
+# Summary:		Same as csvParser.parseCsv, but served from the cache when possible.
+# Desc:			Falls back to csvParser.parseCsv for new or modified CSVs, then stores the result for the next run.
+#               Failing to write the cache is not an error, the parsed data is still returned.
+#
+# Input:		The CSV file path, as a string.
+#               The cache directory, as a string. When None, the cache is not used.
+# Output:		A tuple, (title, comments, columns), see csvParser.parseCsv.
+def loadCsv(csvPath: str, cacheDir: str = None):
+    if cacheDir is None:
+        with profiler.stage('parseCsv'):
+            return csvParser.parseCsv(csvPath)
+
+    key = __getKey(csvPath)
+    dataPath, metaPath = __getEntryPaths(csvPath, cacheDir)
+
+    with profiler.stage('read cache'):
+        entry = __readEntry(dataPath, metaPath, key)
+    if entry is not None:
+        return entry
+
+    with profiler.stage('parseCsv'):
+        title, comments, columns = csvParser.parseCsv(csvPath)
+    try:
+        __writeEntry(dataPath, metaPath, key, title, comments, columns)
+    except OSError as e:
+        print(f'WARNING: Could not cache {csvPath} in {cacheDir}, {e}.')
+
+    return title, comments, columns
+
+# Name:			storeColumns
+# Summary:		Stores parsed contents that were not read from a CSV file, ex. straight from the raw data, in the cache.
+# Desc:			Written like any other entry, under the name of the CSV they would be in, but keyed by the file they were read
+#               from. The columns are then read back memory-mapped, so they can be paged out instead of staying in memory.
+#
+# Input:		The CSV file name, the path of the file the contents were read from, the cache directory, and the contents,
+#               see csvParser.parseCsv.
+# Output:		The columns, memory-mapped from the cache. The given columns when the cache could not be written.
+def storeColumns(csvName: str, sourcePath: str, cacheDir: str, title, comments, columns):
+    dataPath, metaPath = __getEntryPaths(csvName, cacheDir)
+    try:
+        __writeEntry(dataPath, metaPath, __getKey(sourcePath), title, comments, columns)
+        return np.asarray(np.load(dataPath, mmap_mode = 'r', allow_pickle = False))
+    except (OSError, ValueError) as e:
+        print(f'WARNING: Could not cache {csvName} in {cacheDir}, {e}.')
+        return columns
+
+#PRIVATE
+
+# identifies the exact version of a CSV file (or any other file), as a dictionary
+def __getKey(csvPath):
+    stat = os.stat(csvPath)
+    return {
+        'version': CACHE_VERSION,
+        'path': os.path.abspath(csvPath),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns
+    }
+
+# returns the paths of the data and metadata files of the cache entry for a CSV
+def __getEntryPaths(csvPath, cacheDir):
+    name = os.path.basename(csvPath)
+    return os.path.join(cacheDir, name + '.npy'), os.path.join(cacheDir, name + '.json')
+
+# Name:			__readEntry
+# Summary:		Reads a cache entry.
+#
+# Input:		The entry paths, and the key of the CSV file currently on disk.
+# Output:		A tuple, (title, comments, columns), or None when the entry is missing, stale, or unreadable.
+def __readEntry(dataPath, metaPath, key):
+    try:
+        with open(metaPath, 'r', encoding = 'utf8') as file:
+            meta = json.load(file)
+        if meta['key'] != key:
+            return None
+        columns = np.asarray(np.load(dataPath, mmap_mode = 'r', allow_pickle = False))  #plain ndarray view of the mapping
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return meta['title'], meta['comments'], columns
+
+# Name:			__writeEntry
+# Summary:		Writes a cache entry.
+# Desc:			Both files are written under a temporary name then renamed, so an interrupted run never leaves a half written
+#               entry behind. The metadata is written last, since an entry without it is never read.
+#
+# Input:		The entry paths, the key of the CSV file, and its parsed contents.
+# Output:		None.
+def __writeEntry(dataPath, metaPath, key, title, comments, columns):
+    os.makedirs(os.path.dirname(dataPath), exist_ok = True)
+
+    tmpDataPath = dataPath + '.tmp'
+    with open(tmpDataPath, 'wb') as file:  #np.save would append .npy to a name without it
+        np.save(file, columns, allow_pickle = False)
+    os.replace(tmpDataPath, dataPath)
+
+    tmpMetaPath = metaPath + '.tmp'
+    with open(tmpMetaPath, 'w', encoding = 'utf8') as file:
+        json.dump({'key': key, 'title': title, 'comments': comments}, file)
+    os.replace(tmpMetaPath, metaPath)
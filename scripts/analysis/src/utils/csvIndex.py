@@ -0,0 +1,158 @@
+# Name:			csvIndex
+# Summary:		Index of the metadata in CSV file names, without reading any CSV.
+# Desc:			Every processed CSV is named {position}_{time}_{activity}_{vmin}_{vmax}_{rr}_{icc}.csv, or with two positions for
+#               three-probe runs (see keithley_import). The cells, time, and activity parameters of a CSV only need its name, so
+#               they can be indexed for thousands of CSVs in a fraction of a second, ex. for the cells used summary (see
+#               analysisWrapper.index_csv_files).
+#
+#               A CsvName is the compact record of one name, the one CsvFile keeps. Names are split once, and every field is
+#               kept typed (a datetime, floats, enums), plus the text of the activity parameters, so the reports print them as
+#               written. Strings for the reports are only formatted when a formatted field, like timeStamp_month, is used.
+
+#import dependencies
+import os
+from datetime import datetime
+from enum import Enum
+
+NO_NEIGHBOR_CELL = '<2 probe measurement, so no neighbor cell>'  #observedCellCoord of two-probe CSVs, like CsvFile
+
+#PUBLIC
+
+class Activity(Enum) :
+    FORM = 'form'
+    SET = 'set'
+    RESET = 'reset'
+    OBSERVE = 'observe'
+
+class ProbeMode(Enum) :
+    TWO_PROBE = 2
+    THREE_PROBE = 3
+
+# Name:			CsvName
+# Summary:		The metadata of a CSV, from its file name.
+#
+# Input:		The file name, the heated and observed cell coordinates, as strings, then
+#               probeMode           - ProbeMode
+#               time, hasSeconds    - the time stamp, as a datetime, and whether the name includes its seconds
+#               activity            - Activity, None when the name has an unknown activity
+#               vmin, vmax, rampRate - as in the name, as floats. None when the name has no number there, ex. no ramp rate
+#               parameterText       - vmin, vmax, and rampRate as written in the name, for the reports, as a tuple of strings
+#               complianceCurrent   - in A, as a float. Likewise None when the name has no number there
+class CsvName :
+    __slots__ = ('csvFileName', 'heatedCellCoord', 'observedCellCoord', 'probeMode', 'time', 'hasSeconds', 'activity',
+                 'vmin', 'vmax', 'rampRate', 'parameterText', 'complianceCurrent')
+
+    def __init__(self, csvFileName: str, heatedCellCoord: str, observedCellCoord: str, probeMode: ProbeMode, time: datetime,
+                 hasSeconds: bool, activity: Activity, vmin: float, vmax: float, rampRate: float, parameterText: tuple,
+                 complianceCurrent: float) :
+        self.csvFileName = csvFileName
+        self.heatedCellCoord = heatedCellCoord      #ex. "wafer1,0,0,-1,-1,0,0"
+        self.observedCellCoord = observedCellCoord  #NO_NEIGHBOR_CELL for two-probe CSVs
+        self.probeMode = probeMode
+        self.time = time
+        self.hasSeconds = hasSeconds
+        self.activity = activity
+        self.vmin = vmin                            #platinum voltage of two-probe observe runs
+        self.vmax = vmax                            #copper voltage of two-probe observe runs
+        self.rampRate = rampRate                    #in V/s
+        self.parameterText = parameterText          #ex. ('0', '-3', '1.0')
+        self.complianceCurrent = complianceCurrent
+
+    @property
+    def isThreeProbe(self) -> bool :
+        return self.probeMode is ProbeMode.THREE_PROBE
+
+    # the activity as in the name, lowercase, ex. "set", also when unknown
+    @property
+    def activityName(self) -> str :
+        if self.activity is not None :
+            return self.activity.value
+        return self.csvFileName.split('_')[3 if self.isThreeProbe else 2].lower()
+
+    # the name without its activity parameters, ex. ['(wafer1,0,0,-1,-1,0,1)', '2202241139', 'reset']
+    @property
+    def runFolderName(self) -> list :
+        return self.csvFileName.split('_')[:-4]
+
+    # time stamp as an int, with seconds, for sorting, ex. 230221100101
+    @property
+    def timeStamp_whole(self) -> int :
+        t = self.time
+        return (((((t.year - 2000)*100 + t.month)*100 + t.day)*100 + t.hour)*100 + t.minute)*100 + t.second
+
+    @property
+    def timeStamp_year(self) -> str :
+        return str(self.time.year)
+
+    @property
+    def timeStamp_month(self) -> str :
+        return self.time.strftime("%B")
+
+    @property
+    def timeStamp_day(self) -> str :
+        return f'{self.time.day:02d}'
+
+    # in 24hr format
+    @property
+    def timeStamp_hour(self) -> str :
+        return f'{self.time.hour:02d}'
+
+    @property
+    def timeStamp_minute(self) -> str :
+        return f'{self.time.minute:02d}'
+
+    @property
+    def timeStamp_second(self) -> str :
+        return f'{self.time.second:02d}'
+
+    # e.g. 10:53:12PM, or 10:53PM without seconds
+    @property
+    def timeStamp_time12hr(self) -> str :
+        return self.time.strftime("%I:%M:%S%p" if self.hasSeconds else "%I:%M%p")
+
+    # e.g. 141012, or 1410 without seconds
+    @property
+    def timeStamp_time24hr(self) -> str :
+        return self.time.strftime("%H%M%S" if self.hasSeconds else "%H%M")
+
+# Name:			parseCsvName
+# Summary:		Parses the metadata of a CSV file name, in one pass.
+#
+# Input:		The CSV file name, as a string. Spaces are ignored, like in CsvFile.
+# Output:		CsvName
+def parseCsvName(csvFileName: str) -> CsvName :
+    csvFileName = csvFileName.replace(' ', '')
+    fileNameSplit = csvFileName.split('_')  # ex.(wafer1,0,0,-1,-1,0,1)_2202241139_reset_0_-3_1_5mA.csv
+    fileNameSplit[-1] = fileNameSplit[-1][:-4]  #remove .csv
+    if fileNameSplit[0][0] == '(' and fileNameSplit[1][0] == '(' :
+        probeMode, observedCellCoord, i = ProbeMode.THREE_PROBE, fileNameSplit[1][1:-1], 2
+    else :
+        probeMode, observedCellCoord, i = ProbeMode.TWO_PROBE, NO_NEIGHBOR_CELL, 1
+
+    timeString = fileNameSplit[i]
+    time = datetime(2000 + int(timeString[0:2]), int(timeString[2:4]), int(timeString[4:6]), int(timeString[6:8]),
+        int(timeString[8:10]), int(timeString[10:12]) if len(timeString) == 12 else 0)
+
+    parameters = fileNameSplit[i+2:i+5]
+    parameters += [''] * (3 - len(parameters))  #missing in short names
+    return CsvName(csvFileName, fileNameSplit[0][1:-1], observedCellCoord, probeMode, time, len(timeString) == 12,
+        __ACTIVITIES.get(fileNameSplit[i+1].lower()), __toFloat(parameters[0]), __toFloat(parameters[1]),
+        __toFloat(parameters[2]), tuple(parameters), __toFloat(fileNameSplit[-1]))
+
+# Name:			indexCsvFolder
+# Summary:		Parses the name of every CSV in a folder.
+#
+# Input:		The folder, as a string. Like analysisWrapper.convert_csv_files, every file but README.md is a CSV.
+# Output:		List of CsvName, in directory order.
+def indexCsvFolder(path: str) -> list :
+    return [parseCsvName(entry.name) for entry in os.scandir(path) if entry.name != 'README.md']
+
+#PRIVATE
+
+__ACTIVITIES = {activity.value: activity for activity in Activity}
+
+def __toFloat(text) :
+    try :
+        return float(text)
+    except ValueError :
+        return None
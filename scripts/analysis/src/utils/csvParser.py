@@ -5,6 +5,7 @@
 
 #import dependencies  
 import typing
+import numpy as np
 
 #PUBLIC
 
@@ -14,9 +15,10 @@ import typing
 #               
 #               Creates list of lines represented as strings. Each entry is one file line. This is used to populate these
 #               instance variables. The comments, titles, and data respectively are extracted from the file.
+#               The numeric body is decoded by numpy in one call, not line by line.
 #
 # Input:		The CSV file path, as a string.
-# Output:		A tuple.
+# Output:		A tuple. The columns are a 2-D float64 array, one row per CSV column, so columns[j] is a contiguous view.
 def parseCsv(csvPath: str):
     #parse file into lines 
     file = open(csvPath, 'r', encoding = 'utf8')  #open the file 
@@ -38,15 +40,10 @@ def parseCsv(csvPath: str):
 
 # removes any blank lines after the comment section
 def __removeBlankLines(lines, lastCommentLineIdx):
-    result = []
-    i = 0
-    for line in lines:
-        if (i <= lastCommentLineIdx):  #copy comment section
+    result = lines[:lastCommentLineIdx+1]  #copy comment section
+    for line in lines[lastCommentLineIdx+1:]:  #remove blanks after comment section
+        if (line and not line.isspace()):  #when string is NOT empty OR blank
             result.append(line)
-        if (i > lastCommentLineIdx):  #remove blanks after comment section
-            if (line and line.strip()):  #when string is NOT empty OR blank
-                result.append(line)
-        i = i + 1
     return result
 
 
@@ -97,30 +94,17 @@ def __extractColumnTitles(lines, lastCommentLineIdx) -> typing.List[str] :
 
 # Name:			__extractColumnData
 # Summary:		Searches file for column data.
-# Desc:			Splits lines of data.
+# Desc:			Decodes every line of data in one bulk numpy call.
 #
 #               Assumes extracted comments from file first, as the column data starts after the comments.
+#               Blank lines were already removed by __removeBlankLines. Columns past the title row are ignored.
 # Refinement:	Add error checking for if comments have been sucessfully extracted yet.
 #
 # Input:		None.
-# Output:		The columns of data (List[List[float]]), as a list of lists, where each entry in each secondary list is 
-#               a float. Each secondary list represents the respective column of the CSV
-def __extractColumnData(lines, lastCommentLineIdx, title) -> typing.List[typing.List[float]] :
-    columns = []  #result
-    
-    #search
-    firstLine = lines[lastCommentLineIdx+2][:-1].split(',')  #split first line that is not a comment
-    for i in range(0, len(title)) :
-        columns.append([float(firstLine[i])])
-
-    for line in lines[lastCommentLineIdx+3:] :
-        # skip blank lines
-        if len(line.strip()) == 0:
-            continue
-
-        splitLine = line[:-1].split(',')
-        for j in range(0, len(title)) :
-            columns[j].append(float(splitLine[j]))
+# Output:		The columns of data (np.ndarray), as a 2-D float64 array of shape (len(title), number of rows). Each row
+#               of the array is a contiguous view of the respective column of the CSV.
+def __extractColumnData(lines, lastCommentLineIdx, title) -> np.ndarray :
+    data = np.loadtxt(lines[lastCommentLineIdx+2:], delimiter=',', dtype=np.float64, usecols=range(len(title)), ndmin=2)
 
     #done
-    return columns
\ No newline at end of file
+    return np.ascontiguousarray(data.T)  #column-major, so each column is contiguous
\ No newline at end of file
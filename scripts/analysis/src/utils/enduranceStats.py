@@ -0,0 +1,104 @@
+# Name:			enduranceStats
+# Summary:		Running statistics of a cell's cycles, for endurance tests where a cell is cycled thousands of times.
+# Desc:			Every statistic here is updated one cycle at a time and takes the same memory no matter how many cycles were
+#               added, so a cell's CSVs can be analysed one by one and dropped right after.
+#                   RunningStats    - count, mean, standard deviation (Welford's algorithm), min, and max
+#                   LogHistogram    - histogram with logarithmic bins, and percentiles estimated from it
+#                   EnduranceStats  - the above for the set voltage and R_on of a cell, overall and per decade of cycles
+
+#import dependencies
+import math
+import numpy as np
+
+# Name:			RunningStats
+# Summary:		Count, mean, standard deviation, min, and max of a stream of values.
+# Desc:			Uses Welford's algorithm, which stays accurate where the sum of squares would lose precision.
+class RunningStats :
+    def __init__(self) :
+        self.count = 0
+        self.mean = 0.0
+        self.min = math.nan
+        self.max = math.nan
+        self.__m2 = 0.0  #sum of squared differences from the mean
+
+    def add(self, value: float) -> None :
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.__m2 += delta * (value - self.mean)
+        self.min = value if self.count == 1 else min(self.min, value)
+        self.max = value if self.count == 1 else max(self.max, value)
+
+    # population standard deviation, like the one in the characteristics report
+    @property
+    def std(self) -> float :
+        return math.sqrt(self.__m2 / self.count) if self.count > 0 else math.nan
+
+# Name:			LogHistogram
+# Summary:		Histogram of positive values, with the same number of bins in every decade.
+# Desc:			Values outside of the range go into the first or last bin. Percentiles are interpolated within a bin, and kept
+#               between the smallest and largest value added, so they are within one bin width (10^(1/binsPerDecade), ~12% by 
+#               default) of the exact value.
+class LogHistogram :
+    def __init__(self, lowDecade: int = 0, highDecade: int = 9, binsPerDecade: int = 20) :
+        self.edges = np.logspace(lowDecade, highDecade, (highDecade - lowDecade) * binsPerDecade + 1)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.range = RunningStats()  #only its min and max are used
+
+    def add(self, value: float) -> None :
+        idx = np.searchsorted(self.edges, value, side='right') - 1
+        self.counts[min(max(idx, 0), len(self.counts) - 1)] += 1
+        self.range.add(value)
+
+    @property
+    def total(self) -> int :
+        return int(self.counts.sum())
+
+    # Name:			percentile
+    # Summary:		Estimates the q-th percentile (0 to 100) of the values added, NaN when empty.
+    def percentile(self, q: float) -> float :
+        total = self.total
+        if total == 0 :
+            return math.nan
+        cumulative = np.cumsum(self.counts)
+        target = max(q / 100 * total, 1e-9)  #above 0, so the bin found always has values
+        idx = min(int(np.searchsorted(cumulative, target, side='left')), len(self.counts) - 1)
+        below = cumulative[idx] - self.counts[idx]
+        fraction = (target - below) / self.counts[idx] if self.counts[idx] > 0 else 0.0
+        low, high = math.log10(self.edges[idx]), math.log10(self.edges[idx + 1])
+        return min(max(10 ** (low + fraction * (high - low)), self.range.min), self.range.max)
+
+# Name:			EnduranceStats
+# Summary:		Set voltage and R_on statistics of a cell, overall and per decade of cycles (1-9, 10-99, 100-999, ...).
+class EnduranceStats :
+    def __init__(self) :
+        self.cycles = 0          #cycles added
+        self.setVoltage = RunningStats()
+        self.r_on = RunningStats()
+        self.r_onHistogram = LogHistogram()
+        self.decades = {}        #decade -> (set voltage RunningStats, R_on LogHistogram)
+
+    # Name:			add
+    # Summary:		Adds one cycle.
+    #
+    # Input:		The cycle number, its set voltage, and its R_on. NaN for values that were not measured or not valid.
+    # Output:		None.
+    def add(self, cycle: int, setVoltage: float, r_on: float) -> None :
+        self.cycles += 1
+        decade = len(str(max(cycle, 1))) - 1  #number of digits - 1, exact unlike log10
+        if decade not in self.decades :
+            self.decades[decade] = (RunningStats(), LogHistogram())
+        decadeSetVoltage, decadeR_on = self.decades[decade]
+
+        if not math.isnan(setVoltage) :
+            self.setVoltage.add(setVoltage)
+            decadeSetVoltage.add(setVoltage)
+        if not math.isnan(r_on) and r_on > 0 :
+            self.r_on.add(r_on)
+            self.r_onHistogram.add(r_on)
+            decadeR_on.add(r_on)
+
+    # the cycles of a decade, as a string, ex. '10-99'
+    @staticmethod
+    def decadeLabel(decade: int) -> str :
+        return f'{max(10 ** decade, 1)}-{10 ** (decade + 1) - 1}'
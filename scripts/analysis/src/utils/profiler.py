@@ -0,0 +1,218 @@
+# Name:			profiler
+# Summary:		Opt-in timing of every stage of the analysis: wall time, CPU time, and memory, per cell and overall.
+# Desc:			Off by default, then stage() and cell() do nothing, so the instrumented code runs as before. Once enabled (the
+#               --profile argument or the ANALYSIS_PROFILE environment variable, see __main__), every stage records:
+#                   items       - how many times it ran, or items it processed. None for the totals
+#                   wall, cpu   - its own wall and CPU time in seconds. Stages can nest, and the time of a nested stage only
+#                                 counts for that stage, not for the stage around it, so the stages of a cell add up to its total
+#                   process peak RSS so far - the peak resident memory of the process up to the end of the stage, in MB.
+#                                 Not the stage's own peak: once a heavy stage ran, every later stage shows at least its
+#                                 peak. So look for the stage where it rises. Not available on Windows (no resource
+#                                 module), left empty there
+#               Stages run within cell() are recorded for that cell, and for the overall stage too. Report workers (--jobs)
+#               profile themselves, and hand their records to the main process with takeRecords and addRecords.
+#
+#               writeReport writes profile.json and profile.csv, both with every stage per cell and overall.
+
+#import dependencies
+import os
+import sys
+import csv
+import json
+import time
+import functools
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  #Windows
+    resource = None
+
+ENV_VARIABLE = 'ANALYSIS_PROFILE'
+REPORT_NAME = 'profile'  #profile.json and profile.csv
+
+__enabled = False
+__start = None              #(wall, cpu) time profiling started at
+__cell = ''                 #cell the stages are recorded for, '' outside of any cell
+__open = []                 #stages in progress, innermost last, as [wall start, cpu start, nested wall, nested cpu]
+__records = OrderedDict()   #(cell, stage) -> [items, wall, cpu, process peak RSS so far]
+__DISABLED = nullcontext()
+
+#PUBLIC
+
+# Name:			enable
+# Summary:		Starts recording every stage, until the process exits.
+# Desc:			Drops any record there already is, ex. copied from the main process into a forked worker process.
+def enable() -> None:
+    global __enabled, __start
+    __enabled = True
+    __start = (time.perf_counter(), __getCpuTime())
+    __records.clear()
+
+def isEnabled() -> bool:
+    return __enabled
+
+# Name:			stage
+# Summary:		Context manager timing the code within it as one stage.
+#
+# Input:		The stage name, as a string, and the number of items the stage processes, as an int.
+# Output:		The context manager.
+def stage(name: str, items: int = 1):
+    if not __enabled:
+        return __DISABLED
+    return __timeStage(name, items)
+
+# Name:			timed
+# Summary:		Decorator timing every call of a function as one stage, see stage.
+def timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Name:			cell
+# Summary:		Context manager recording the stages within it for a cell.
+#
+# Input:		The cell coordinate, as a string.
+# Output:		The context manager.
+def cell(cellCoord: str):
+    if not __enabled:
+        return __DISABLED
+    return __inCell(cellCoord)
+
+# Name:			takeRecords
+# Summary:		Removes and returns the records of this process, ex. to send them from a worker process to the main process.
+#
+# Input:		None.
+# Output:		List of (cell, stage, items, wall, cpu, process peak RSS so far) tuples.
+def takeRecords() -> list:
+    records = [key + tuple(record) for key, record in __records.items()]
+    __records.clear()
+    return records
+
+# Name:			addRecords
+# Summary:		Adds the records of another process, see takeRecords.
+def addRecords(records: list) -> None:
+    for cellCoord, name, items, wall, cpu, peakRss in records :
+        __add(cellCoord, name, items, wall, cpu, peakRss)
+
+# Name:			writeReport
+# Summary:		Writes profile.json and profile.csv into the given folder.
+# Desc:			The total wall time is the time since enable. The total CPU time and peak memory include worker processes that
+#               have exited.
+#
+# Input:		The folder, as a string.
+# Output:		None.
+def writeReport(path: str) -> None:
+    total = __getEntry(None, time.perf_counter() - __start[0], __getCpuTime() - __start[1],
+        __max(__getPeakRss(), __getPeakRss(children=True)))
+
+    cells = OrderedDict()
+    overall = OrderedDict()
+    for (cellCoord, name), record in __records.items() :
+        if cellCoord != '' :
+            cells.setdefault(cellCoord, OrderedDict())[name] = __getEntry(*record)
+        __merge(overall, name, record)
+
+    report = OrderedDict([
+        ('total', total),
+        ('stages', overall),
+        ('cells', OrderedDict((cellCoord, OrderedDict([('total', __getTotal(stages)), ('stages', stages)]))
+            for cellCoord, stages in cells.items()))
+    ])
+    with open(f'{path}/{REPORT_NAME}.json', 'w', encoding='utf8') as file:
+        json.dump(report, file, indent=1)
+
+    with open(f'{path}/{REPORT_NAME}.csv', 'w', newline='', encoding='utf8') as file:
+        write = csv.writer(file)
+        write.writerow(['cell', 'stage', 'items', 'wall (s)', 'cpu (s)', 'process peak RSS so far (MB)'])
+        for cellCoord, stages in cells.items() :
+            __writeRows(write, f'({cellCoord})', stages, __getTotal(stages))
+        __writeRows(write, 'all', overall, total)
+
+    print(f'MESSAGE: Wrote the profile, {REPORT_NAME}.json and {REPORT_NAME}.csv, to {path}.')
+
+#PRIVATE
+
+@contextmanager
+def __timeStage(name, items):
+    frame = [time.perf_counter(), time.process_time(), 0.0, 0.0]
+    __open.append(frame)
+    try:
+        yield
+    finally:
+        __open.pop()
+        wall = time.perf_counter() - frame[0]
+        cpu = time.process_time() - frame[1]
+        if len(__open) > 0 :  #not part of the stage around it
+            __open[-1][2] += wall
+            __open[-1][3] += cpu
+        __add(__cell, name, items, wall - frame[2], cpu - frame[3], __getPeakRss())
+
+@contextmanager
+def __inCell(cellCoord):
+    global __cell
+    previous, __cell = __cell, cellCoord
+    try:
+        yield
+    finally:
+        __cell = previous
+
+def __add(cellCoord, name, items, wall, cpu, peakRss) -> None:
+    record = __records.get((cellCoord, name))
+    if record is None :
+        __records[(cellCoord, name)] = [items, wall, cpu, peakRss]
+    else :
+        record[0] += items
+        record[1] += wall
+        record[2] += cpu
+        record[3] = __max(record[3], peakRss)
+
+# adds a record to the entry of a stage in a report
+def __merge(stages, name, record) -> None:
+    entry = stages.get(name)
+    if entry is None :
+        stages[name] = __getEntry(*record)
+    else :
+        stages[name] = __getEntry(entry['items'] + record[0], entry['wall'] + record[1], entry['cpu'] + record[2],
+            __max(entry['processPeakRss'], record[3]))
+
+# sum of the stages of a cell
+def __getTotal(stages) -> dict:
+    total = __getEntry(None, 0.0, 0.0, None)
+    for entry in stages.values() :
+        total = __getEntry(None, total['wall'] + entry['wall'], total['cpu'] + entry['cpu'],
+            __max(total['processPeakRss'], entry['processPeakRss']))
+    return total
+
+def __getEntry(items, wall, cpu, peakRss) -> dict:
+    return OrderedDict([('items', items), ('wall', wall), ('cpu', cpu), ('processPeakRss', peakRss)])
+
+def __writeRows(write, cellLabel, stages, total) -> None:
+    for name, entry in list(stages.items()) + [('total', total)] :
+        items = '' if entry['items'] is None else entry['items']
+        peakRss = '' if entry['processPeakRss'] is None else f"{entry['processPeakRss']:.1f}"
+        write.writerow([cellLabel, name, items, f"{entry['wall']:.6f}", f"{entry['cpu']:.6f}", peakRss])
+
+# CPU time of this process, and of its worker processes that have exited
+def __getCpuTime() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+# peak resident memory in MB, of this process or of its largest exited child, None when not available
+def __getPeakRss(children=False):
+    if resource is None :
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024**2 if sys.platform == 'darwin' else maxrss / 1024  #bytes on macOS, KB elsewhere
+
+def __max(a, b):
+    if a is None :
+        return b
+    if b is None :
+        return a
+    return max(a, b)
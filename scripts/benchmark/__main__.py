@@ -0,0 +1,188 @@
+# Name:			__main__
+# Summary:		Benchmarks the import and the analysis on synthetic data (see synthetic), and prints the time of every stage.
+# Desc:			Stages are timed one after the other, each over every run or cell, so a regression in one shows up on its own line:
+#                   import      - index_runs, read_run (excel workbook and run.xml), and convert_run (read_run and CSV write).
+#                                 Skipped when xlwt, needed to write the workbooks, is not installed.
+#                   analysis    - parseCsv, CsvFile construction, every CellAnalyzer metric, the batch analysis, getPlots,
+#                                 and the PDF build of each report.
+#                   startup     - a new Python process importing the analysis, with and without the plotting and PDF
+#                                 libraries, and running `--list-cells` and `--summary-only` on the analysis data.
+#               Data is generated in a temporary folder, removed afterwards unless --keep is given.
+#
+#               Run from anywhere: `python scripts/benchmark --cells 4 --cycles 10 --samples 2000`
+
+#import dependencies
+import os
+import sys
+import json
+import shutil
+import argparse
+import subprocess
+import tempfile
+import time
+from collections import OrderedDict
+
+scriptsDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(scriptsDir, 'analysis'))
+sys.path.append(os.path.join(scriptsDir, 'processing'))
+
+import synthetic
+import keithley_import
+import src.utils.csvParser as csvParser
+from src.utils.CsvFile import CsvFile
+import src.analysisWrapper as analysisWrapper
+import src.generateReport as generateReport
+import src.BatchAnalyzer as BatchAnalyzer
+
+#CellAnalyzer metrics, and the activities they apply to, see CellAnalyzer.CsvAnalysis
+METRICS = OrderedDict([
+    ('measurement',  ['form', 'set', 'reset', 'observe']),
+    ('setVoltage',   ['form', 'set']),
+    ('resistance',   ['reset']),
+    ('linearRegime', ['reset']),
+    ('rampRate',     ['form', 'set', 'reset']),
+    ('cellState',    ['form', 'set', 'reset', 'observe']),
+    ('energy',       ['reset', 'observe'])
+])
+
+# Name:			Timings
+# Summary:		Total time and item count of every stage, in the order they were first timed.
+class Timings :
+    def __init__(self) :
+        self.stages = OrderedDict()
+
+    # Name:			time
+    # Summary:		Runs func and adds its wall time to the stage.
+    #
+    # Input:		The stage name, the number of items func processes, the function, and its arguments.
+    # Output:		What func returns.
+    def time(self, stage: str, count: int, func, *args) :
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        total, items = self.stages.get(stage, (0.0, 0))
+        self.stages[stage] = (total + elapsed, items + count)
+        return result
+
+    def print(self) -> None :
+        print(f'{"stage":<44}{"items":>8}{"total (s)":>12}{"per item (ms)":>16}')
+        for stage, (total, items) in self.stages.items() :
+            perItem = total / items * 1000 if items > 0 else float('nan')
+            print(f'{stage:<44}{items:>8}{total:>12.3f}{perItem:>16.3f}')
+
+    def toDict(self) -> dict :
+        return OrderedDict((stage, {'items': items, 'seconds': total}) for stage, (total, items) in self.stages.items())
+
+# Name:			benchmarkImport
+# Summary:		Times keithley_import on the raw data of the runs.
+def benchmarkImport(timings, runs, resourcesDir) :
+    logFileName = synthetic.writeRawData(runs, resourcesDir)
+    os.makedirs(f'{resourcesDir}processed_data', exist_ok=True)
+    rows = keithley_import.get_log_jobs(f'{resourcesDir}raw_data/{logFileName}.csv', 'all')
+    jobs = [job for rowOutput, rowJobs in rows for job in rowJobs]
+
+    index = timings.time('import: index_runs', len(jobs), keithley_import.index_runs, resourcesDir)
+    keithley_import.check_runs(jobs, index, 'all')
+    for job in jobs :
+        run, output = timings.time('import: read_run', 1, keithley_import.read_run_captured, job, resourcesDir)
+        if run is None :
+            print(output, end='')
+    for job in jobs :
+        job.run.time = None  #read run.xml again, like a first import
+        timings.time('import: convert_run', 1, keithley_import.convert_run_captured, job, resourcesDir)
+
+# Name:			benchmarkAnalysis
+# Summary:		Times every analysis stage on the processed CSVs of the runs.
+def benchmarkAnalysis(timings, runs, resourcesDir) :
+    processedDir = f'{resourcesDir}processed_data/'
+    csvNames = synthetic.writeCsvs(runs, resourcesDir)
+
+    for csvName in csvNames :
+        timings.time('parseCsv', 1, csvParser.parseCsv, processedDir + csvName)
+    csvFiles = [timings.time('CsvFile construction', 1, CsvFile, processedDir + csvName) for csvName in csvNames]
+
+    for csvFile in csvFiles :
+        csvFile.timeAxis  #load the contents first, only time the calculations
+        for metric, activities in METRICS.items() :
+            if csvFile.activity in activities :
+                timings.time(f'CellAnalyzer: {metric}', 1, getattr, csvFile.analysis, metric)
+        csvFile.release()
+
+    timings.time('BatchAnalyzer.analyzeBatch', len(csvFiles), BatchAnalyzer.analyzeBatch, csvFiles)
+
+    for csvFile in csvFiles :
+        csvFile.timeAxis
+        timings.time('CsvFile.getPlots', 1, csvFile.getPlots)
+        csvFile.release()
+
+    csvData = analysisWrapper.convert_csv_files(processedDir)
+    reportsDir = f'{resourcesDir}analysis_reports/'
+    summaryDir = f'{reportsDir}summary/'
+    os.makedirs(summaryDir)
+    summaryDict = timings.time('cellsUsedSummary', len(csvData), getattr(analysisWrapper, '__generateSummaryReport'), summaryDir, csvData)
+    for csvItems in csvData.values() :
+        timings.time('PDF build: characteristics report', 1, generateReport.generateReport, csvItems, summaryDict, summaryDir)
+        for csvFile in csvItems :
+            csvFile.release()
+    for csvItems in csvData.values() :
+        timings.time('PDF build: plots report', 1, getattr(analysisWrapper, '__pdfGen'), csvItems, summaryDict, summaryDir)
+        for csvFile in csvItems :
+            csvFile.release()
+    timings.time('generate_reports (all cells)', len(csvData), analysisWrapper.generate_reports, f'{reportsDir}all/',
+        analysisWrapper.convert_csv_files(processedDir))
+
+# Name:			benchmarkStartup
+# Summary:		Times the startup of new Python processes, since imports are only paid once per process.
+# Desc:			Run after benchmarkAnalysis, on its CSVs. An empty interpreter is timed too, to tell Python's own startup apart.
+def benchmarkStartup(timings, resourcesDir) :
+    analysisDir = os.path.join(scriptsDir, 'analysis')
+    workDir = os.path.dirname(os.path.dirname(resourcesDir))  #the folder holding resources/
+    def run(cwd, *args) :
+        subprocess.run([sys.executable] + list(args), cwd=cwd, check=True, stdout=subprocess.DEVNULL)
+
+    timings.time('startup: python', 1, run, analysisDir, '-c', 'pass')
+    timings.time('startup: import analysisWrapper', 1, run, analysisDir, '-c', 'import src.analysisWrapper')
+    timings.time('startup: import generateReport', 1, run, analysisDir, '-c', 'import src.generateReport')
+    csvCount = len(os.listdir(f'{resourcesDir}processed_data'))
+    timings.time('startup: --list-cells', csvCount, run, workDir, analysisDir, '--list-cells')
+    timings.time('startup: --summary-only', csvCount, run, workDir, analysisDir, '--summary-only')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cells', type=int, default=2, help='number of cells')
+    parser.add_argument('--cycles', type=int, default=10, help='number of set/reset cycles per cell')
+    parser.add_argument('--samples', type=int, default=1000, help='number of samples (rows) per run')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--skip-import', action='store_true', help='only benchmark the analysis')
+    parser.add_argument('--json', type=str, default=None, help='also write the timings to this JSON file, to compare runs')
+    parser.add_argument('--keep', type=str, default=None, help='generate the data in this folder, and keep it')
+    args = parser.parse_args()
+
+    if args.keep is not None :
+        workDir = os.path.abspath(args.keep)
+        os.makedirs(workDir)
+    else :
+        workDir = tempfile.mkdtemp(prefix='benchmark')
+    workDir = workDir.replace('\\', '/')
+
+    timings = Timings()
+    runs = timings.time('generate runs', 1, synthetic.generateRuns, args.cells, args.cycles, args.samples, args.seed)
+    print(f'MESSAGE: {len(runs)} runs of {args.samples} samples, for {args.cells} cells, in {workDir}.')
+    try :
+        if not args.skip_import :
+            try :
+                import xlwt
+            except ImportError :
+                print('WARNING: Skipping the import benchmark, it needs the xlwt package to generate raw data.')
+            else :
+                benchmarkImport(timings, runs, f'{workDir}/import/resources/')
+        benchmarkAnalysis(timings, runs, f'{workDir}/analysis/resources/')
+        benchmarkStartup(timings, f'{workDir}/analysis/resources/')
+    finally :
+        if args.keep is None :
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    timings.print()
+    if args.json is not None :
+        with open(args.json, 'w', encoding='utf-8') as f :
+            json.dump({'arguments': vars(args), 'stages': timings.toDict()}, f, indent=1)
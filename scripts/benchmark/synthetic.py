@@ -0,0 +1,216 @@
+# Name:			synthetic
+# Summary:		Generates synthetic but realistic Keithley data, for the benchmarks.
+# Desc:			Every cell is formed, then set and reset for a number of cycles, with an observe run (verify set) after every few
+#               cycles and a three-probe heating run with its neighbor cell. Sweeps follow the shape of real IV curves: a set
+#               jumps to the compliance current at its set voltage, and a reset is ohmic (R_on) until the current drops at its
+#               reset voltage, so every CellAnalyzer metric has something to find.
+#
+#               Two kinds of input are generated, from the same runs:
+#                   raw data        - resources/raw_data/<procedure>/Run<N>/data@1[N].xls and run.xml, plus the log file, in
+#                                     the layout keithley_import expects. Needs the xlwt package.
+#                   processed CSVs  - resources/processed_data/<name>.csv, named and laid out like keithley_import writes them.
+
+#import dependencies
+import os
+import csv
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+LOG_FILE_NAME = 'synthetic_log'
+LAB_UTC_OFFSET = timedelta(hours=-5)  #run times are in the lab's time zone (EST) in CSV names, and UTC in run.xml
+RAMP_RATE = 0.1  #V/s, of every sweep
+
+#PUBLIC
+
+# Name:			SyntheticRun
+# Summary:		One run of one cell, and its data.
+#
+# Input:		Its run number, procedure type (log file code), activity, heated and observed cell locations, time, compliance
+#               current, ramp rate, comment, column titles, and data (2-D float64 array, one row per column).
+class SyntheticRun :
+    def __init__(self, num, procedureType, activity, arrayLoc, heatCellLoc, obsCellLoc, time, icc, rampRate, comment, title, columns) :
+        self.num = num
+        self.procedureType = procedureType
+        self.activity = activity
+        self.arrayLoc = arrayLoc
+        self.heatCellLoc = heatCellLoc
+        self.obsCellLoc = obsCellLoc    #None for two-probe runs
+        self.time = time                #lab time
+        self.icc = icc
+        self.rampRate = rampRate
+        self.comment = comment
+        self.title = title
+        self.columns = columns
+
+    @property
+    def isThreeProbe(self) -> bool :
+        return self.obsCellLoc is not None
+
+    @property
+    def isSampling(self) -> bool :
+        return self.activity == 'observe'
+
+    # the CSV file name keithley_import gives this run, without extension
+    @property
+    def csvName(self) -> str :
+        position = f'(wafer1,{self.arrayLoc[0]},{self.arrayLoc[1]},-1,-1,{self.heatCellLoc[0]},{self.heatCellLoc[1]})'
+        if self.isThreeProbe :
+            position += f'_(wafer1,{self.arrayLoc[0]},{self.arrayLoc[1]},-1,-1,{self.obsCellLoc[0]},{self.obsCellLoc[1]})'
+        if self.isSampling :
+            vmin, vmax, rr = 0, 0, '0'
+        else :
+            voltages = self.columns[[2, 4] if self.isThreeProbe else [2]]
+            vmin, vmax = int(min(voltages.min(), 0)), int(max(voltages.max(), 0))
+            rr = self.rampRate
+        return f'{position}_{self.time.strftime(r"%y%m%d%H%M%S")}_{self.activity}_{vmin}_{vmax}_{rr}_{self.icc}'
+
+# Name:			generateRuns
+# Summary:		Generates the runs of every cell.
+#
+# Input:		The number of cells, the number of set/reset cycles per cell, the number of samples per run, and the random seed.
+# Output:		A list of SyntheticRun, in measurement order.
+def generateRuns(cells: int, cycles: int, samples: int, seed: int = 0) -> list :
+    rng = np.random.default_rng(seed)
+    runs = []
+    time = datetime(2023, 2, 21, 9, 0, 0)
+
+    def add(procedureType, activity, arrayLoc, cellLoc, obsCellLoc, icc, title, columns, comment) :
+        nonlocal time
+        time += timedelta(seconds=int(rng.integers(30, 300)))
+        runs.append(SyntheticRun(len(runs) + 1, procedureType, activity, arrayLoc, cellLoc, obsCellLoc, time, icc, RAMP_RATE, 
+            comment, title, columns))
+
+    for cell in range(cells) :
+        arrayLoc = (cell // 25 % 5, cell // 125 % 16)
+        cellLoc = (cell // 5 % 5, cell % 5)
+        neighborLoc = (cellLoc[0], (cellLoc[1] + 1) % 5)
+        r_on = rng.uniform(300, 800)  #each cell has its own typical R_on
+
+        add('F', 'form', arrayLoc, cellLoc, None, 5e-05, ['Time', 'AI', 'AV'],
+            __setSweep(rng, samples, 5e-05, rng.uniform(2.5, 3.5), 5.0), 'synthetic form')
+        for cycle in range(cycles) :
+            add('R', 'reset', arrayLoc, cellLoc, None, 0.003, ['Time', 'AI', 'AV'],
+                __resetSweep(rng, samples, r_on * rng.lognormal(0, 0.1), rng.uniform(0.6, 1.2), -2.0), f'cycle {cycle + 1}')
+            add('S', 'set', arrayLoc, cellLoc, None, 5e-05, ['Time', 'AI', 'AV'],
+                __setSweep(rng, samples, 5e-05, rng.uniform(1.5, 2.5), 5.0), f'cycle {cycle + 1}')
+            if cycle % 5 == 4 :
+                add('VS', 'observe', arrayLoc, cellLoc, None, 5e-05, ['Time', 'AI', 'AV'],
+                    __observe(rng, samples, 0.1, r_on), 'verify set')
+                add('H', 'observe', arrayLoc, cellLoc, neighborLoc, 5e-05, ['Time', 'AI', 'AV', 'BI', 'BV'],
+                    __observe(rng, samples, 0.1, r_on, neighbor=True), 'heating')
+    return runs
+
+# Name:			writeCsvs
+# Summary:		Writes every run to processed_data, like keithley_import does.
+#
+# Input:		The runs, and the resources directory, as a string ending in '/'.
+# Output:		The CSV file names, as a list of strings.
+def writeCsvs(runs: list, resourcesDir: str) -> list :
+    processedDir = f'{resourcesDir}processed_data/'
+    os.makedirs(processedDir, exist_ok=True)
+    names = []
+    for run in runs :
+        comment = run.comment if not run.isSampling else f'Observe Type: {run.procedureType}; {run.comment}'
+        with open(f'{processedDir}{run.csvName}.csv', 'w', encoding='utf-8') as f :
+            write = csv.writer(f)
+            write.writerow(['---'])
+            write.writerow([comment])
+            write.writerow(['---'])
+            write.writerow(run.title)
+            write.writerows(run.columns.T.tolist())
+        names.append(f'{run.csvName}.csv')
+    return names
+
+# Name:			writeRawData
+# Summary:		Writes the raw data of every run, and the log file listing them, to raw_data.
+# Desc:			Sheet1 holds the data, Sheet3 the settings keithley_import reads: the sweep mode, step size, terminals, and
+#               compliance currents. Every run has one incomplete row, like real sheets sometimes do.
+#
+# Input:		The runs, and the resources directory, as a string ending in '/'.
+# Output:		The log file name, without extension.
+def writeRawData(runs: list, resourcesDir: str) -> str :
+    import xlwt  #only needed to generate raw data
+
+    rawDir = f'{resourcesDir}raw_data/'
+    os.makedirs(rawDir, exist_ok=True)
+    with open(f'{rawDir}{LOG_FILE_NAME}.csv', 'w', newline='') as f :
+        write = csv.writer(f)
+        write.writerow(['Date', 'Wafer', 'Procedure', 'Array', 'Cell 1', 'Cell 2', 'Run', 'Comments'])
+        for run in runs :
+            write.writerow([run.time.strftime('%m/%d/%Y'), 1, run.procedureType, f'({run.arrayLoc[0]},{run.arrayLoc[1]})',
+                f'({run.heatCellLoc[0]},{run.heatCellLoc[1]})',
+                f'({run.obsCellLoc[0]},{run.obsCellLoc[1]})' if run.isThreeProbe else '', run.num, run.comment])
+
+    for run in runs :
+        runDir = f'{rawDir}{run.procedureType}/Run{run.num}'
+        os.makedirs(runDir, exist_ok=True)
+
+        book = xlwt.Workbook()
+        data = book.add_sheet('Sheet1')
+        book.add_sheet('Sheet2')
+        settings = book.add_sheet('Sheet3', cell_overwrite_ok=True)
+        for col, title in enumerate(run.title) :
+            data.write(0, col, title)
+        for row, values in enumerate(run.columns.T.tolist()) :
+            for col, value in enumerate(values) :
+                if not (row == 7 and col == 1) :  #incomplete row, dropped by keithley_import
+                    data.write(row + 1, col, value)
+        __writeSettings(settings, run)
+        book.save(f'{runDir}/data@1[{run.num}].xls')
+
+        utcTime = (run.time - LAB_UTC_OFFSET).replace(tzinfo=timezone.utc)
+        with open(f'{runDir}/run.xml', 'w', encoding='utf-8') as f :
+            f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<Run><Info><Name>synthetic</Name><Device>Keithley 4200A</Device></Info>'
+                    f'<Time>{utcTime.strftime("%Y-%m-%dT%H:%M:%S")}.0000000Z</Time>'
+                    f'{"<Setting>synthetic</Setting>" * 200}</Run>\n')
+
+    return LOG_FILE_NAME
+
+#PRIVATE
+
+# Sheet3 layout, see keithley_import.read_run
+def __writeSettings(settings, run) :
+    for row in range(24) :
+        settings.write(row, 0, '-')
+    settings.write(2, 1, 'Sampling' if run.isSampling else 'Sweeping')
+    settings.write(12, 1, 'A')
+    settings.write(12, 2, 'B' if run.isThreeProbe else 'C')
+    settings.write(14, 0, 'Name')
+    settings.write(14, 1, 'AV')
+    settings.write(14, 2, 'BV' if run.isThreeProbe else 'CV')
+    if run.isThreeProbe :
+        settings.write(14, 3, '-')  #fourth column, three-probe
+    iccRow = 18 if run.isSampling else 21
+    settings.write(iccRow, 0, 'Compliance')
+    settings.write(iccRow, 1, run.icc)
+    settings.write(iccRow, 2, 0.003 if run.isThreeProbe else 'N/A')
+    if not run.isSampling :
+        settings.write(19, 0, 'Step')
+        settings.write(19, 1, run.rampRate)
+        settings.write(19, 2, run.rampRate)
+
+# time axis of a sweep from 0 V to endV
+def __sweepTime(samples, endV) :
+    return np.linspace(0, abs(endV) / RAMP_RATE, samples)
+
+# set or form: a small leakage current, then the compliance current from the set voltage on
+def __setSweep(rng, samples, icc, setV, endV) :
+    time = __sweepTime(samples, endV)
+    v = np.linspace(0, endV, samples)
+    i = np.where(v < setV, v * 2e-7, icc * rng.uniform(0.97, 1.0, samples)) + rng.normal(0, 1e-9, samples)
+    return np.array([time, i, v])
+
+# reset: ohmic with resistance r_on, then a few nA from the reset voltage on
+def __resetSweep(rng, samples, r_on, resetV, endV) :
+    time = __sweepTime(samples, endV)
+    v = np.linspace(0, endV, samples)
+    i = np.where(np.abs(v) < resetV, v / r_on, rng.normal(-5e-9, 1e-9, samples))
+    return np.array([time, i * rng.normal(1, 0.002, samples), v])
+
+# observe: constant voltage on the cell (and its neighbor), sampled over a minute
+def __observe(rng, samples, v, r_on, neighbor=False) :
+    time = np.linspace(0, 60, samples)
+    columns = [time, v / r_on * rng.normal(1, 0.01, samples), np.full(samples, v)]
+    if neighbor :
+        columns += [v / (r_on * 10) * rng.normal(1, 0.01, samples), np.full(samples, -0.9)]
+    return np.array(columns)
@@ -3,15 +3,27 @@
 # Desc:         Be wary of excel binary and excel formatting, such as utf8 vs utf16.
 # Refinement:   Parse data from raw data, not log file when able.
 #               Potentially, change date arg to default to "all" so make it optional arg.
-#               Make functions for some code from "sort" for maintainability. 
+#               Make functions for some code from "convert_run" for maintainability. 
 
 import os
+import io
+import json
+import hashlib
 import argparse
 import csv
 import xlrd
-from xml.dom.minidom import Element, parse as parse_xml
-from datetime import datetime
-import pytz
+import numpy as np
+from contextlib import redirect_stdout
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import iterparse
+from datetime import datetime, timezone
+from time import perf_counter
+try:
+    from zoneinfo import ZoneInfo  #python 3.9+, needs the tzdata package on Windows
+    LAB_TIMEZONE = ZoneInfo('US/Eastern')
+except Exception:
+    import pytz
+    LAB_TIMEZONE = pytz.timezone('US/Eastern')
 
 #maps excel cell numbers as per log file formatting standard
 #input: line/row of excel file 
@@ -51,42 +63,111 @@ class LogRow:
     def getPrintableString(self):
         return self.__dict__
 
+#one run of one log file line, everything needed to convert its raw data on its own
+#input: row index in log file, LogRow object, run number, cell position and activity parsed from the LogRow
+class RunJob:
+    def __init__(self, row_idx, ln, num, position, activity):
+        self.row_idx = row_idx
+        self.ln = ln
+        self.num = num
+        self.position = position
+        self.activity = activity
+        self.run = None  #RunEntry of its raw data, set by check_runs. None when it has none
+
+#one run folder in raw_data, ex. raw_data/S/Run12, found by index_runs
+#input: procedure type and run number, as in the log file, paths of the folder, its excel workbook and its run.xml, the
+#size and modification time of the workbook, and of its run.xml. Paths, sizes, and times are None for missing files
+class RunEntry:
+    def __init__(self, procedure_type, num, run_dir, xls_path, xml_path, size, mtime, xml_size, xml_mtime):
+        self.procedure_type = procedure_type
+        self.num = num
+        self.run_dir = run_dir
+        self.xls_path = xls_path
+        self.xml_path = xml_path
+        self.size = size
+        self.mtime = mtime
+        self.xml_size = xml_size
+        self.xml_mtime = xml_mtime
+        self.time = None  #text of the Time element of run.xml, read by get_run_time
+        self.xml_time = 0.0  #seconds spent reading run.xml, 0 when the time came from the run index
+
+#everything read from the raw data of one run, what convert_run writes to its CSV
+#input: CSV file name without extension, comment, column titles, and the validated data (see read_table)
+class RunData:
+    def __init__(self, file_name, comment, title, columns):
+        self.file_name = file_name
+        self.comment = comment
+        self.title = title
+        self.columns = columns
+
+#what happened to one run during an import, for the import log (see IMPORT_LOG_NAME)
+#status is 'converted', 'read' (read but not written, see stream_runs), 'skipped' (already converted), 'no raw data',
+#'read error', or 'write error'. Times are in seconds, counts and times are None for steps the run did not get to
+#input: RunJob object
+class RunRecord:
+    def __init__(self, job):
+        self.num = job.num
+        self.op_code = job.ln.procedure_type
+        self.log_line = job.row_idx + 1
+        self.status = None
+        self.csv = None
+        self.rows_read = None
+        self.rows_dropped = None  #incomplete rows, see read_table
+        self.bytes_written = None
+        self.xls_open_time = None
+        self.xml_parse_time = None
+        self.write_time = None
+
 def remove_parenthesis(str):
     new_str = str.replace('(','')
     new_str = new_str.replace(')','')
     return new_str
 
-def find_min_max(table):
+#reads Sheet1 column by column, and leaves out incomplete rows (rows with a blank cell) in one step
+#input: xlrd sheet
+#output: title row, and the data of the complete rows as a 2-D float64 array, one row per column, laid out like csvParser.parseCsv
+def read_table(table):
+    titleRow = table.row_values(0)
+    cols = [table.col_values(col, start_rowx=1) for col in range(table.ncols)]
+    try:
+        return titleRow, np.array(cols, dtype=np.float64)  #no blank cell
+    except ValueError:
+        cells = np.array(cols, dtype=object).reshape(table.ncols, table.nrows - 1)
+        complete = (cells != '').all(axis=0)  #skip incomplete data
+        return titleRow, cells[:, complete].astype(np.float64)
+
+#input: data as returned by read_table
+def find_min_max(columns):
     #when raw data is 2-terminal, but one terminal is ground probe, there are only 2 data columns in sheet 1 therefore only 1 voltages column.
-    if (table.ncols > 3):
-        avmin = int(min(table.col_values(4 ,start_rowx=1)))
-        avmax = int(max(table.col_values(4, start_rowx=1)))
+    if (len(columns) > 3):
+        avmin = int(columns[4].min())
+        avmax = int(columns[4].max())
     else:
         avmin = 0  #ground stays constant at 0 Volts
         avmax = 0
-    bvmin = int(min(table.col_values(2 ,start_rowx=1)))
-    bvmax = int(max(table.col_values(2 ,start_rowx=1)))
+    bvmin = int(columns[2].min())
+    bvmax = int(columns[2].max())
     
     vmin = min(avmin,bvmin)
     vmax = max(avmax,bvmax)
     return vmin,vmax
 
-def keithley_time(folder_name):
-    xml_file = f'{folder_name}/run.xml'
-    doc = parse_xml(xml_file)
+#reads the text of the first Time element of run.xml, ex. '2023-02-21T15:01:01.1234567Z'
+#stops as soon as it is found, instead of parsing the whole file
+def read_xml_time(xml_file):
+    for event, el in iterparse(xml_file, events=('end',)):
+        if (el.tag == 'Time') or el.tag.endswith('}Time'):  #with or without a namespace
+            return el.text
+    raise ValueError(f'No Time element in {xml_file}.')
 
-    time_el: Element = doc.getElementsByTagName("Time")[0]
-
-    s: str = time_el.firstChild.data
+#converts the UTC time text of run.xml to the time in the lab
+def to_lab_time(s):
     s = s.replace('T', ' ')[:-1]
     s = s[:s.index('.')]
 
     # parse from iso after removing T and Z
-    d = datetime.fromisoformat(s).replace(tzinfo=pytz.UTC)
-    tz = pytz.timezone('US/Eastern')
-    loc = d.astimezone(tz)
-
-    return loc    
+    d = datetime.fromisoformat(s).replace(tzinfo=timezone.utc)
+    return d.astimezone(LAB_TIMEZONE)
 
 #does not contain thorough validity checking
 #contains error handling 
@@ -140,7 +221,10 @@ def check_blank_cell(str):
         changed_str = str
     return changed_str
         
-def sort(line, date_in, reso_dir):
+#parses one log file line into the runs it references
+#input: log file line, its row index in the log file, date argument
+#output: list of RunJob objects, empty when the line is skipped or invalid
+def get_run_jobs(line, row_idx, date_in):
     ln = LogRow(line)  #mapping
     lnValid = check_blank_line(ln)
     if (lnValid):
@@ -151,20 +235,20 @@ def sort(line, date_in, reso_dir):
             loc = remove_parenthesis(array_loc).split(',')
             valid = isValidArrayLocation(int(loc[0]), int(loc[1]))
             if not valid:
-                print(f'ERROR: Encountered unexpected cell array coordinate {array_loc} in sort. Using placeholder (-1,-1) for CSV.')
+                print(f'ERROR: Encountered unexpected cell array coordinate {array_loc} in get_run_jobs. Using placeholder (-1,-1) for CSV.')
                 array_loc = '-1,-1'
             heat_cell_loc = ln.heat_cell_loc
             loc = remove_parenthesis(heat_cell_loc).split(',')
             valid = isValidCellLocation(int(loc[0]), int(loc[1]))
             if not valid:
-                print(f'ERROR: Encountered unexpected cell coordinate {heat_cell_loc} in sort. Using placeholder (-1,-1) for CSV.')
+                print(f'ERROR: Encountered unexpected cell coordinate {heat_cell_loc} in get_run_jobs. Using placeholder (-1,-1) for CSV.')
                 heat_cell_loc = '-1,-1'
             obs_cell_loc = ln.obs_cell_loc
             if (obs_cell_loc != ''):  #obs cell can be empty and valid
                 loc = remove_parenthesis(obs_cell_loc).split(',')
                 valid = isValidCellLocation(int(loc[0]), int(loc[1]))
                 if not valid:
-                    print(f'ERROR: Encountered unexpected cell coordinate {obs_cell_loc} in sort. Using placeholder (-1,-1) for CSV.')
+                    print(f'ERROR: Encountered unexpected cell coordinate {obs_cell_loc} in get_run_jobs. Using placeholder (-1,-1) for CSV.')
                     obs_cell_loc = '-1,-1'
                 
             #parse activity
@@ -183,190 +267,534 @@ def sort(line, date_in, reso_dir):
                 position = f'(wafer{wafer},{remove_parenthesis(array_loc)},-1,-1,{remove_parenthesis(heat_cell_loc)})'
                 
             #parse runs
-            icc_A = ''  #icc for one cell, for terminal A
-            icc_B = ''  #icc for second cell
-            isThreeProbe = False
-            
-            run_num = ln.run_num.split(',')
-            
-            for num in run_num:
+            jobs = []
+            for num in ln.run_num.split(','):
                 num = str(num).replace(" ", "")  #remove spaces in list
-                
-                #parse excel workbook
-                runDir = f'{reso_dir}raw_data/'
-                runDir += ln.procedure_type
-                runDir += '/Run'+str(num)
-                print(str(runDir))
-                xlsDir = f'{runDir}/data@1[{str(num)}].xls'  
-                try:
-                    book = xlrd.open_workbook(xlsDir)
-                    table = book.sheet_by_index(0)  #Sheet1
-                    settings = book.sheet_by_index(2)  #Sheet3
-                    numCols = settings.ncols
-                    numRows = settings.nrows
-                    
-                    #parse rr/step size
-                        # Step size not same thing as ramp rate!
-                        # Sweeping mode vs Sampling Mode:
-                        # Sampling - constant voltage, no ramp rate
-                        # Sweeping - variable voltage, so ramp rate/step size valid
-                    rr = ''
-                    mode = settings.cell_value(2,1)  #B3
-                    rr_invalid = False
-                    icc_row = -1
-                    if (mode == "Sampling"):  #Step row does not exist!
-                        rr_invalid = True
-                        rr = '0'  #step size is zero
-                        icc_row = 18
-                    elif (mode == "Sweeping"):
-                        icc_row = 21
-                        step_row = 19
-                        if (settings.cell_value(step_row,0) == "Step"):
-                            B20 = settings.cell_value(step_row,1)
-                            C20 = settings.cell_value(step_row,2)  #assume 2-probe
-                            if (B20 == "N/A"):
-                                if (C20 == "N/A"):
-                                    print(f'ERROR: Expected step size in data@1[{str(num)}].xls.')
-                                else:
-                                    rr = C20
-                            else:
-                                if (C20 != B20):
-                                    print(f'ERROR: Different step sizes for two probe in data@1[{str(num)}].xls.')
-                                else:
-                                    rr = B20
-                    
-                    #parse icc
-                    device_terminal_row = 12
-                    if (numRows > 22):
-                        nameExists = False  
-                        iccExists = False
-                        name_row = 14
-                        if (settings.cell_value(name_row,0) == "Name"):  #A15
-                            nameExists = True
-                        else:
-                            print(f'ERROR: Could not find Name in data@1[{str(num)}].xls.')
-                            
-                        if (numCols > 3):  #3 probe
-                            isThreeProbe = True
-                            if (settings.cell_value(icc_row,0) == "Compliance"):
-                                #differenciate icc for the 2 cells 
-                                col_AV = -1
-                                col_BV = -1
-                                B15 = settings.cell_value(name_row,1)
-                                C15 = settings.cell_value(name_row,2)
-                                D15 = settings.cell_value(name_row,3)
-                                candidates = [B15, C15, D15]
-                                col_idx = 1
-                                for value in candidates:
-                                    if (value == "AV"):  #terminal A
-                                        col_AV = col_idx
-                                    elif (value == "BV"):  #terminal B
-                                        col_BV = col_idx
-                                    #iterate
-                                    col_idx += 1
-                                #find iccs
-                                icc_A = settings.cell_value(icc_row,col_AV)  #in amps, ex. 6e-05, ex. 0.003
-                                icc_B = settings.cell_value(icc_row,col_BV)  #in amps, ex. 6e-05, ex. 0.003
-                            else:
-                                print(f'ERROR: Could not find Compliance in data@1[{str(num)}].xls.')
-   
-                        elif (numCols > 2):  #2 probe means 1 cell so only looking for 1, any, Icc
-                            if (settings.cell_value(icc_row,0) == "Compliance"):
-                                #ID columns for terminal A, B, and C
-                                col_icc = -1
-                                B13 = settings.cell_value(device_terminal_row,1)
-                                C13 = settings.cell_value(device_terminal_row,2)
-                                candidates = [B13, C13]
-                                col_idx = 1
-                                for value in candidates:
-                                    if not (value == "C"):  #assume C is ground aka GNDU
-                                        if (value == "A") or (value == "B"):
-                                            col_icc = col_idx
-                                    #iterate
-                                    col_idx += 1
-                                #done
-                                icc_A = settings.cell_value(icc_row,col_icc)  #in amps, ex. 6e-05, ex. 0.003
-                                icc_B = settings.cell_value(icc_row,col_icc)
-                            else:
-                                print (f'{settings.cell_value(icc_row,0)}')
-                                print(f'ERROR: Could not find Compliance in data@1[{str(num)}].xls.')
-                        else:
-                            print(f'ERROR: Unexpected data in data@1[{str(num)}].xls.')
-                    
-                    #convert icc
-                    if (icc_A == "N/A"):
-                        icc_A = 0
-                        print(f'WARNING: Grabbed N/A as terminal A Icc for data@1[{str(num)}].xls.')
-                    else:
-                        icc_A = float(icc_A)  #use decimal.Decimal(icc) if seeing arithmetic error
-                    if (icc_B == "N/A"):
-                        icc_B = 0
-                        print(f'WARNING: Grabbed N/A as terminal B Icc for data@1[{str(num)}].xls.')
+                jobs.append(RunJob(row_idx, ln, num, position, activity))
+            return jobs
+    return []
+
+#scans raw_data once for every run folder, so runs are looked up instead of probed for one by one
+#input: resources directory
+#run.xml times are taken from the last saved index when run.xml did not change
+#output: dictionary of RunEntry objects, keyed like the manifest, ex. 'S/Run12'
+def index_runs(reso_dir):
+    index = {}
+    try:
+        with open(f'{reso_dir}{RUN_INDEX_NAME}', 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    rawDir = f'{reso_dir}raw_data'
+    for procedureDir in os.scandir(rawDir):
+        if not procedureDir.is_dir():
+            continue
+        for runDir in os.scandir(procedureDir.path):
+            if not (runDir.is_dir() and runDir.name.startswith('Run')):
+                continue
+            num = runDir.name[3:]
+            runPath = f'{rawDir}/{procedureDir.name}/{runDir.name}'
+            files = {f.name: f for f in os.scandir(runDir.path)}
+            xlsPath, size, mtime = get_file_stat(files, runPath, f'data@1[{num}].xls')
+            xmlPath, xmlSize, xmlMtime = get_file_stat(files, runPath, 'run.xml')
+            key = f'{procedureDir.name}/{runDir.name}'
+            run = RunEntry(procedureDir.name, num, runPath, xlsPath, xmlPath, size, mtime, xmlSize, xmlMtime)
+            cached = cache.get(key)
+            if (cached is not None) and (cached['xml'] == [xmlSize, xmlMtime]):
+                run.time = cached['time']
+            index[key] = run
+    return index
+
+#output: path, size, and modification time of a file listed by os.scandir, Nones when it is not there
+def get_file_stat(files, runPath, name):
+    if name not in files:
+        return None, None, None
+    stat = files[name].stat()
+    return f'{runPath}/{name}', stat.st_size, stat.st_mtime_ns
+
+#run.xml times read by previous imports, so they are only read once
+#maps each run folder (ex. 'S/Run12') to the size and modification time of its run.xml, and its Time text
+RUN_INDEX_NAME = 'run_index.json'
+
+#saves the run.xml times of the index, see RUN_INDEX_NAME
+def save_run_index(index, reso_dir):
+    cache = {key: {'xml': [run.xml_size, run.xml_mtime], 'time': run.time} for key, run in index.items() if run.time is not None}
+    tmpPath = f'{reso_dir}{RUN_INDEX_NAME}.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=1)
+    os.replace(tmpPath, f'{reso_dir}{RUN_INDEX_NAME}')
+
+#output: the run's time in the lab, from run.xml. Only read once the run index does not have it yet
+def get_run_time(run):
+    if run.time is None:
+        start = perf_counter()
+        run.time = read_xml_time(run.xml_path)
+        run.xml_time = perf_counter() - start
+    return to_lab_time(run.time)
+
+#reads the run.xml times of runs about to be read, in this process, so they can be saved with save_run_index
+#runs whose run.xml cannot be read are left as is, their error is reported when they are read
+def load_run_times(jobs):
+    for job in jobs:
+        if (job.run is not None) and (job.run.xml_path is not None):
+            try:
+                get_run_time(job.run)
+            except Exception:
+                pass
+
+#looks up the raw data of every run in the index, and reports problems before any run is read:
+#runs without raw data, runs listed more than once, and, when every date is imported, raw data no log file line lists
+#input: list of RunJob objects, index from index_runs, date argument
+#output: None. Sets the run of every RunJob
+def check_runs(jobs, index, date_in):
+    listed = {}
+    for job in jobs:
+        key = get_manifest_key(job)
+        job.run = index.get(key)
+        listed.setdefault(key, []).append(job.row_idx + 1)
+
+    for key, lines in listed.items():
+        run = index.get(key)
+        if (run is None) or (run.xls_path is None):
+            print(f'ERROR: No raw data for {key} (log line {", ".join(map(str, lines))}), expected {key}/data@1[{key.split("/Run")[-1]}].xls.')
+        if len(lines) > 1:
+            print(f'WARNING: {key} is listed more than once, on log lines {", ".join(map(str, lines))}. '
+                  'It is converted for every line, check that the lines are meant to be different.')
+    if date_in == 'all':
+        unlisted = sorted(key for key, run in index.items() if (key not in listed) and (run.xls_path is not None))
+        if len(unlisted) > 0:
+            print(f'WARNING: {len(unlisted)} runs in raw_data are not in the log file: {", ".join(unlisted)}.')
+
+#reads the raw data of one run: its parameters, for the CSV name, and its validated Sheet1 rows
+#independent of every other run, so runs can be read in any order or in parallel
+#input: RunJob object, resources directory, and optionally the RunRecord to fill in
+#output: RunData object, None when the raw data could not be read
+def read_run(job, reso_dir, record=None):
+    if record is None:
+        record = RunRecord(job)
+    ln = job.ln
+    num = job.num
+    position = job.position
+    activity = job.activity
+    icc_A = ''  #icc for one cell, for terminal A
+    icc_B = ''  #icc for second cell
+    isThreeProbe = False
+
+    #parse excel workbook
+    print(f'{reso_dir}raw_data/{get_manifest_key(job)}')  #the run's raw data folder
+    if (job.run is None) or (job.run.xls_path is None):  #already reported by check_runs
+        print(f'ERROR: No raw data for data@1[{str(num)}].xls.')
+        record.status = 'no raw data'
+        return None
+    try:
+        start = perf_counter()
+        book = xlrd.open_workbook(job.run.xls_path)
+        record.xls_open_time = perf_counter() - start
+        table = book.sheet_by_index(0)  #Sheet1
+        settings = book.sheet_by_index(2)  #Sheet3
+        numCols = settings.ncols
+        numRows = settings.nrows
+
+        #parse rr/step size
+            # Step size not same thing as ramp rate!
+            # Sweeping mode vs Sampling Mode:
+            # Sampling - constant voltage, no ramp rate
+            # Sweeping - variable voltage, so ramp rate/step size valid
+        rr = ''
+        mode = settings.cell_value(2,1)  #B3
+        rr_invalid = False
+        icc_row = -1
+        if (mode == "Sampling"):  #Step row does not exist!
+            rr_invalid = True
+            rr = '0'  #step size is zero
+            icc_row = 18
+        elif (mode == "Sweeping"):
+            icc_row = 21
+            step_row = 19
+            if (settings.cell_value(step_row,0) == "Step"):
+                B20 = settings.cell_value(step_row,1)
+                C20 = settings.cell_value(step_row,2)  #assume 2-probe
+                if (B20 == "N/A"):
+                    if (C20 == "N/A"):
+                        print(f'ERROR: Expected step size in data@1[{str(num)}].xls.')
                     else:
-                        icc_B = float(icc_B)  #use decimal.Decimal(icc) if seeing arithmetic error
-
-                    #parse time
-                    time = keithley_time(runDir)
-                    time = time.strftime(r'%y%m%d%H%M%S')
-                    
-                    #parse vmin, vmax,, only valid when rr valid 
-                    if (rr_invalid):
-                        vmin = 0
-                        vmax = 0
+                        rr = C20
+                else:
+                    if (C20 != B20):
+                        print(f'ERROR: Different step sizes for two probe in data@1[{str(num)}].xls.')
                     else:
-                        vmin, vmax = find_min_max(table)
-                    
-                    #create/overwrite to csv file
-                    icc = icc_A  #WARNING: only sending icc for ONE cell
-                    file_name = f'{position}_{time}_{activity}_{vmin}_{vmax}_{rr}_{icc}' 
-                    with open(f'{reso_dir}processed_data/{file_name}.csv', 'w', encoding='utf-8') as f:
-                        if activity == 'observe':
-                            ln.comment = "Observe Type: " + ln.procedure_type + "; " + ln.comment
-                        write = csv.writer(f)
-                        write.writerow(['---'])
-                        write.writerow([ln.comment])
-                        write.writerow(['---'])
-                        titleRow = table.row_values(0)
-                        for row_num in range(table.nrows):
-                            row_value = table.row_values(row_num)
-                            if (isValidTableRow(row_value, titleRow)):  #skip incomplete data
-                                write.writerow(row_value)
-                    print(f'MESSAGE: {file_name} is generated successfully. Ignore the warning.\n')
-                except:
-                    print(f'ERROR: Error during CSV file generation for data@1[{str(num)}].xls.')
-
-
-#checks data in Sheet 1 of XLS file for corruption (unexpected blanks)
-def isValidTableRow(row, titleRow):
-    if (row == titleRow):
-        return True
-    #when part of a line is blank (not entire line), skip processing that line
+                        rr = B20
+
+        #parse icc
+        device_terminal_row = 12
+        if (numRows > 22):
+            nameExists = False  
+            iccExists = False
+            name_row = 14
+            if (settings.cell_value(name_row,0) == "Name"):  #A15
+                nameExists = True
+            else:
+                print(f'ERROR: Could not find Name in data@1[{str(num)}].xls.')
+
+            if (numCols > 3):  #3 probe
+                isThreeProbe = True
+                if (settings.cell_value(icc_row,0) == "Compliance"):
+                    #differenciate icc for the 2 cells 
+                    col_AV = -1
+                    col_BV = -1
+                    B15 = settings.cell_value(name_row,1)
+                    C15 = settings.cell_value(name_row,2)
+                    D15 = settings.cell_value(name_row,3)
+                    candidates = [B15, C15, D15]
+                    col_idx = 1
+                    for value in candidates:
+                        if (value == "AV"):  #terminal A
+                            col_AV = col_idx
+                        elif (value == "BV"):  #terminal B
+                            col_BV = col_idx
+                        #iterate
+                        col_idx += 1
+                    #find iccs
+                    icc_A = settings.cell_value(icc_row,col_AV)  #in amps, ex. 6e-05, ex. 0.003
+                    icc_B = settings.cell_value(icc_row,col_BV)  #in amps, ex. 6e-05, ex. 0.003
+                else:
+                    print(f'ERROR: Could not find Compliance in data@1[{str(num)}].xls.')
+
+            elif (numCols > 2):  #2 probe means 1 cell so only looking for 1, any, Icc
+                if (settings.cell_value(icc_row,0) == "Compliance"):
+                    #ID columns for terminal A, B, and C
+                    col_icc = -1
+                    B13 = settings.cell_value(device_terminal_row,1)
+                    C13 = settings.cell_value(device_terminal_row,2)
+                    candidates = [B13, C13]
+                    col_idx = 1
+                    for value in candidates:
+                        if not (value == "C"):  #assume C is ground aka GNDU
+                            if (value == "A") or (value == "B"):
+                                col_icc = col_idx
+                        #iterate
+                        col_idx += 1
+                    #done
+                    icc_A = settings.cell_value(icc_row,col_icc)  #in amps, ex. 6e-05, ex. 0.003
+                    icc_B = settings.cell_value(icc_row,col_icc)
+                else:
+                    print (f'{settings.cell_value(icc_row,0)}')
+                    print(f'ERROR: Could not find Compliance in data@1[{str(num)}].xls.')
+            else:
+                print(f'ERROR: Unexpected data in data@1[{str(num)}].xls.')
+
+        #convert icc
+        if (icc_A == "N/A"):
+            icc_A = 0
+            print(f'WARNING: Grabbed N/A as terminal A Icc for data@1[{str(num)}].xls.')
+        else:
+            icc_A = float(icc_A)  #use decimal.Decimal(icc) if seeing arithmetic error
+        if (icc_B == "N/A"):
+            icc_B = 0
+            print(f'WARNING: Grabbed N/A as terminal B Icc for data@1[{str(num)}].xls.')
+        else:
+            icc_B = float(icc_B)  #use decimal.Decimal(icc) if seeing arithmetic error
+
+        #parse time
+        time = get_run_time(job.run)
+        time = time.strftime(r'%y%m%d%H%M%S')
+        record.xml_parse_time = job.run.xml_time
+
+        #parse data
+        titleRow, columns = read_table(table)
+        record.rows_read = table.nrows - 1
+        record.rows_dropped = record.rows_read - columns.shape[1]
+
+        #parse vmin, vmax,, only valid when rr valid 
+        if (rr_invalid):
+            vmin = 0
+            vmax = 0
+        else:
+            vmin, vmax = find_min_max(columns)
+
+        icc = icc_A  #WARNING: only sending icc for ONE cell
+        file_name = f'{position}_{time}_{activity}_{vmin}_{vmax}_{rr}_{icc}' 
+        comment = ln.comment
+        if activity == 'observe':
+            comment = "Observe Type: " + ln.procedure_type + "; " + comment
+        record.status = 'read'
+        return RunData(file_name, comment, titleRow, columns)
+    except:
+        print(f'ERROR: Error during CSV file generation for data@1[{str(num)}].xls.')
+        record.status = 'read error'
+        return None
+
+#converts the raw data of one run into a CSV in processed_data
+#input: RunJob object, resources directory
+#output: name of the generated CSV file, None when it could not be generated, and the RunRecord of the run
+def convert_run(job, reso_dir):
+    record = RunRecord(job)
+    run = read_run(job, reso_dir, record)
+    if run is None:
+        return None, record
+    csvPath = f'{reso_dir}processed_data/{run.file_name}.csv'
+    try:
+        #create/overwrite to csv file
+        start = perf_counter()
+        with open(csvPath, 'w', encoding='utf-8') as f:
+            write = csv.writer(f)
+            write.writerow(['---'])
+            write.writerow([run.comment])
+            write.writerow(['---'])
+            write.writerow(run.title)
+            write.writerows(run.columns.T.tolist())  #python floats, written just like the cell values
+        record.write_time = perf_counter() - start
+        record.bytes_written = os.path.getsize(csvPath)
+    except:
+        print(f'ERROR: Error during CSV file generation for data@1[{str(job.num)}].xls.')
+        record.status = 'write error'
+        return None, record
+    print(f'MESSAGE: {run.file_name} is generated successfully. Ignore the warning.\n')
+    record.status = 'converted'
+    record.csv = f'{run.file_name}.csv'
+    return record.csv, record
+
+#runs func, returning its result along with everything it printed, so output of runs converted in parallel is not interleaved
+#output: (result, printed text)
+def capture_output(func, *args):
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = func(*args)
+    return result, output.getvalue()
+
+#convert_run for worker processes, see capture_output
+def convert_run_captured(job, reso_dir):
+    return capture_output(convert_run, job, reso_dir)
+
+#read_run for worker processes, see capture_output
+def read_run_captured(job, reso_dir):
+    return capture_output(read_run, job, reso_dir)
+
+#collects every run to convert from the log file
+#input: log file path, date argument
+#output: list of (printed text, list of RunJob) for every log file line
+def get_log_jobs(log_file, date_in):
+    rows = []
+    with open(log_file, newline = '') as f:  #set newline to prevent /r/n /n conflicts
+        csv_reader = csv.reader(f)
+        i = 0
+        for line in csv_reader:
+            if (i > 0):  #skip header row
+                rowJobs, rowOutput = capture_output(get_run_jobs, line, i, date_in)
+                rows.append((rowOutput, rowJobs))
+            i = i + 1
+    return rows
+
+#reads the raw data of every run, without writing any CSV, for analysis straight from the raw data
+#a generator, so each run can be processed (and dropped) before the next one is read
+#input: list of RunJob objects, resources directory, number of runs to read in parallel
+#output: yields (RunJob, RunData object or None, printed text) for every run, in the order of jobs
+def stream_runs(jobs, reso_dir, workers=1):
+    if (workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for job, (run, output) in zip(jobs, executor.map(read_run_captured, jobs, [reso_dir] * len(jobs))):
+                yield job, run, output
     else:
-        expectedColNum = len(titleRow)
-        actualColNum = len(row)  #same as expected
-        #count blank cells
-        for cell in row:
-            if (cell == ''):
-                actualColNum -= 1
-        if (actualColNum != expectedColNum):
-            return False
-    return True
- 
+        for job in jobs:
+            run, output = read_run_captured(job, reso_dir)
+            yield job, run, output
+
+
+#manifest of converted runs, so an import only converts runs that are new or changed since the last one
+#maps each run folder (ex. 'S/Run12') to a list of entries, one per log file line listing the run: the line, the fingerprint
+#of the workbook, the log file values the CSV depends on, and the CSV name
+MANIFEST_NAME = 'import_manifest.json'
+
+#input: resources directory
+#output: manifest dictionary, empty when there is none yet
+def load_manifest(reso_dir):
+    try:
+        with open(f'{reso_dir}{MANIFEST_NAME}', 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    for key, entries in manifest.items():
+        if isinstance(entries, dict):  #one entry per run, written by older imports, its line is unknown
+            manifest[key] = [dict(entries, line=None)]
+    return manifest
+
+#writes to a temporary file first, so an interrupted import never leaves a corrupt manifest
+def save_manifest(manifest, reso_dir):
+    tmpPath = f'{reso_dir}{MANIFEST_NAME}.tmp'
+    with open(tmpPath, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmpPath, f'{reso_dir}{MANIFEST_NAME}')
+
+def get_manifest_key(job):
+    return f'{job.ln.procedure_type}/Run{job.num}'
+
+#log file values that end up in the CSV (name or contents), a run must be converted again when any of them changes
+def get_log_signature(job):
+    return [job.position, job.activity, job.ln.comment]
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+#output: the manifest entry of the run when it was converted by a previous import and neither its workbook, its log file
+#line, nor its CSV changed, otherwise None
+#Refinement: the size and modification time are checked first, the workbook is only hashed when they differ
+def get_converted_entry(job, manifest, reso_dir):
+    signature = get_log_signature(job)
+    for entry in manifest.get(get_manifest_key(job), []):
+        if (entry['log'] == signature) and is_converted(job, entry, reso_dir):
+            return entry
+    return None
+
+#output: True when neither the workbook nor the CSV of a manifest entry changed
+def is_converted(job, entry, reso_dir):
+    if not os.path.exists(f'{reso_dir}processed_data/{entry["csv"]}'):  #deleted by user
+        return False
+
+    run = job.run  #size and time from index_runs, no need to stat the workbook again
+    if (run is None) or (run.xls_path is None):
+        return False
+    if run.size != entry['size']:
+        return False
+    if run.mtime == entry['mtime']:
+        return True
+    if hash_file(run.xls_path) == entry['sha256']:  #touched, but same contents
+        entry['mtime'] = run.mtime
+        return True
+    return False
+
+#records a converted run in the manifest, replacing the entry of the same log file line
+#output: name of the CSV the line generated previously when the new one has a different name (ex. log file line was
+#corrected), otherwise None. See remove_replaced_csvs
+def update_manifest(manifest, job, csvName, reso_dir):
+    line = job.row_idx + 1
+    entries = manifest.setdefault(get_manifest_key(job), [])
+    oldEntry = next((entry for entry in entries if entry['line'] in (line, None)), None)
+    if oldEntry is not None:
+        entries.remove(oldEntry)
+
+    entries.append({
+        'line': line,
+        'size': job.run.size,  #the workbook as indexed before it was read
+        'mtime': job.run.mtime,
+        'sha256': hash_file(job.run.xls_path),
+        'log': get_log_signature(job),
+        'csv': csvName
+    })
+    if (oldEntry is not None) and (oldEntry['csv'] != csvName):
+        return oldEntry['csv']
+    return None
+
+#removes the CSVs replaced during an import, see update_manifest
+#a CSV is only removed when no run of the import generated or skipped it, and no manifest entry lists it, so a run listed
+#on more than one log file line never removes the CSV of another line
+#input: manifest, list of (replaced CSV name, new CSV name), list of RunRecord objects of the import, resources directory
+def remove_replaced_csvs(manifest, replaced, records, reso_dir):
+    kept = {record.csv for record in records if record.csv is not None}
+    kept.update(entry['csv'] for entries in manifest.values() for entry in entries)
+    for oldCsv, csvName in replaced:
+        oldCsvPath = f'{reso_dir}processed_data/{oldCsv}'
+        if (oldCsv not in kept) and os.path.exists(oldCsvPath):
+            os.remove(oldCsvPath)
+            print(f'MESSAGE: Removed {oldCsv}, replaced by {csvName}.')
+
+#log of every import, to spot slow or failing runs and follow import throughput over time
+#one JSON object per line, appended by every import: when it started, its arguments, how long it took, and the RunRecord of
+#every run of the log file, in log file order
+IMPORT_LOG_NAME = 'import_log.jsonl'
+
+#input: resources directory, dictionary of the import's details, list of RunRecord objects
+def append_import_log(reso_dir, details, records):
+    entry = dict(details)
+    entry['runs'] = [record.__dict__ for record in sorted(records, key=lambda record: record.log_line)]
+    with open(f'{reso_dir}{IMPORT_LOG_NAME}', 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
 #parse lab manually populated log file AND raw data files to get information about raw data
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('log_file_name', type=str)
     parser.add_argument('date', type=str)
+    parser.add_argument('--jobs', type=int, default=1, help='number of runs to convert in parallel')
+    parser.add_argument('--force', action='store_true', help='convert runs again even when already converted')
     args = parser.parse_args()
     
+    started = datetime.now()
+    startTime = perf_counter()
     curDir = os.getcwd()  #current working directory
     curDir = curDir.replace("\\", "/")
     resourcesDir = curDir + "/resources/"
     logFile = resourcesDir + "raw_data/" + args.log_file_name + ".csv"
 
-    csv_reader = csv.reader(open(logFile, newline = ''))  #set newline to prevent /r/n /n conflicts
-    i = 0
-    for line in csv_reader:
-        if (i > 0):  #skip header row
-            sort(line, args.date, resourcesDir)
-        i = i + 1
+    #first, collect every run to convert from the log file, and find their raw data
+    rows = get_log_jobs(logFile, args.date)  #(printed text, list of RunJob) for every log file line
+    index = index_runs(resourcesDir)
+    check_runs([job for rowOutput, rowJobs in rows for job in rowJobs], index, args.date)
+    #skip runs converted by a previous import
+    manifest = load_manifest(resourcesDir)
+    records = []
+    if not args.force:
+        for rowIdx, (rowOutput, rowJobs) in enumerate(rows):
+            newJobs = []
+            for job in rowJobs:
+                entry = get_converted_entry(job, manifest, resourcesDir)
+                if entry is not None:
+                    entry['line'] = job.row_idx + 1  #the line may have moved
+                    record = RunRecord(job)
+                    record.status = 'skipped'
+                    record.csv = entry['csv']
+                    records.append(record)
+                else:
+                    newJobs.append(job)
+            rows[rowIdx] = (rowOutput, newJobs)
+    skipped = len(records)
+    jobs = [job for rowOutput, rowJobs in rows for job in rowJobs]
+    load_run_times(jobs)
+    save_run_index(index, resourcesDir)
+
+    #then, convert them. Runs are independent of each other
+    if (args.jobs > 1):
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(convert_run_captured, jobs, [resourcesDir] * len(jobs)))
+    else:
+        results = [convert_run_captured(job, resourcesDir) for job in jobs]
+
+    #finally, print everything in log file order
+    results = iter(results)
+    failed = []
+    replaced = []  #(replaced CSV name, new CSV name)
+    for rowOutput, rowJobs in rows:
+        print(rowOutput, end='')
+        for job in rowJobs:
+            (csvName, record), runOutput = next(results)
+            print(runOutput, end='')
+            records.append(record)
+            if csvName is None:
+                failed.append(f'{job.ln.procedure_type}/Run{job.num} (log line {job.row_idx + 1})')
+            else:
+                oldCsv = update_manifest(manifest, job, csvName, resourcesDir)
+                if oldCsv is not None:
+                    replaced.append((oldCsv, csvName))
+    remove_replaced_csvs(manifest, replaced, records, resourcesDir)
+    save_manifest(manifest, resourcesDir)
+    append_import_log(resourcesDir, {
+        'started': started.isoformat(timespec='seconds'),
+        'log_file': args.log_file_name,
+        'date': args.date,
+        'jobs': args.jobs,
+        'force': args.force,
+        'seconds': perf_counter() - startTime,
+        'converted': len(jobs) - len(failed),
+        'failed': len(failed),
+        'skipped': skipped
+    }, records)
+
+    if skipped > 0:
+        print(f'MESSAGE: Skipped {skipped} runs already converted. Use --force to convert them again.')
+    print(f'MESSAGE: Generated {len(jobs) - len(failed)} of {len(jobs)} CSV files.')
+    for run in failed:
+        print(f'ERROR: Failed to convert {run}.')
+    print(f'MESSAGE: Added this import to {IMPORT_LOG_NAME}.')